@@ -0,0 +1,139 @@
+"""
+Multi-account consolidation: statements are sharded by the account in their header and parsed one
+per worker task, each account's ledger is written to its own partition, and reports merge the
+partitions by date.
+"""
+import os
+import re
+import csv
+import heapq
+from datetime import datetime
+import pdfplumber
+from bankstats13 import index_statements, parse_statement
+from dates import parse_statement_date
+from exporters import EXPORT_COLUMNS, TransactionExporter
+from workers import WorkerPool
+from pipeline import FILE_TIMEOUT, FILE_MEMORY_LIMIT_MB
+
+# Matches the account number in a statement header, e.g. "Account number: 1234 5678 90"
+ACCOUNT_NUMBER = re.compile(r'Account\s*(?:number|no\.?|#)\s*:?\s*(\d[\d -]{4,}\d)', re.IGNORECASE)
+
+# Shard for statements whose header has no recognisable account number
+UNKNOWN_ACCOUNT = 'unknown'
+
+# Function to find the account number in statement text, without spaces or dashes
+def detect_account(content):
+    match = ACCOUNT_NUMBER.search(content)
+    return re.sub(r'[ -]', '', match.group(1)) if match else UNKNOWN_ACCOUNT
+
+# Function to read the account number from a statement's first page (runs in a worker process)
+def read_account(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return detect_account(pdf.pages[0].extract_text() or '')
+
+# Function to name an account's partition file
+def partition_path(partition_folder, account):
+    return os.path.join(partition_folder, f"account={account}", 'transactions.csv')
+
+# Function to build one account's date-ordered ledger and write it to the account's partition
+# parsed is (path, future of parse_statement) per statement, in period order
+def build_account_ledger(account, parsed, partition_folder):
+    ledger, summaries, failures = [], [], []
+    for pdf_path, future in parsed:
+        try:
+            summary, transactions = future.result()
+        except Exception as error:
+            failures.append((pdf_path, repr(error)))
+            continue
+        summaries.append((pdf_path, summary))
+        ledger.extend((pdf_path, summary.get('statement_period', ''), transaction) for transaction in transactions)
+    ledger.sort(key=lambda row: parse_statement_date(row[2][0]))
+
+    path = partition_path(partition_folder, account)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with TransactionExporter(path) as exporter:
+        for pdf_path, period, transaction in ledger:
+            exporter.write_statement(pdf_path, {'statement_period': period}, [transaction])
+    return {'account': account, 'path': path, 'rows': len(ledger), 'summaries': summaries, 'failures': failures}
+
+# Function to group the statements in a folder tree by account, reading headers in parallel
+def shard_statements(folder_path, pool, start_date=None, end_date=None):
+    statements = index_statements(folder_path, start_date, end_date)
+    futures = [(statement, pool.submit(read_account, statement[2])) for statement in statements]
+    shards = {}
+    for statement, future in futures:
+        try:
+            account = future.result()
+        except Exception as error:
+            print(f"Warning: Could not read the header of {statement[2]}: {error}")
+            account = UNKNOWN_ACCOUNT
+        shards.setdefault(account, []).append(statement)
+    return shards
+
+# Function to build every account's partition
+# Each statement is its own worker task, so a file that hangs or runs away is killed at the file
+# limits and fails alone instead of holding up its whole account
+def consolidate_accounts(folder_path, partition_folder, workers=None, start_date=None, end_date=None):
+    with WorkerPool(workers, task_timeout=FILE_TIMEOUT, memory_limit_mb=FILE_MEMORY_LIMIT_MB) as pool:
+        shards = shard_statements(folder_path, pool, start_date, end_date)
+        parsed = {account: [(pdf_path, pool.submit(parse_statement, pdf_path, start, end))
+                            for start, end, pdf_path in statements]
+                  for account, statements in sorted(shards.items())}
+        results = []
+        for account, statements in parsed.items():
+            try:
+                results.append(build_account_ledger(account, statements, partition_folder))
+            except Exception as error:
+                print(f"Warning: Failed to build the ledger for account {account}: {error}")
+    return results
+
+# Function to stream one partition's rows as (date, account, row)
+def iter_partition(account, path):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        for row in csv.DictReader(csv_file):
+            yield parse_statement_date(row['date']), account, row
+
+# Function to merge the account partitions into one date-ordered stream without loading them
+def merge_partitions(partitions):
+    streams = [iter_partition(account, path) for account, path in partitions]
+    for _, account, row in heapq.merge(*streams, key=lambda item: item[0]):
+        yield account, row
+
+# Function to write the cross-account report by streaming the k-way merge to CSV
+def write_consolidated_report(partitions, report_path):
+    rows = 0
+    with open(report_path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['account'] + EXPORT_COLUMNS)
+        for account, row in merge_partitions(partitions):
+            writer.writerow([account] + [row[column] for column in EXPORT_COLUMNS])
+            rows += 1
+    return rows
+
+# Main execution function
+def main():
+    folder_path = input("Enter the folder path containing bank statements: ")
+    partition_folder = input("Enter the output folder for the account partitions: ") or os.path.join(folder_path, 'accounts')
+    date_range = input("Enter a date range to process (DD/MM/YYYY - DD/MM/YYYY), or leave blank for all: ").strip()
+    range_start = range_end = None
+    if date_range:
+        range_start, range_end = (datetime.strptime(d.strip(), '%d/%m/%Y') for d in date_range.split('-'))
+
+    results = consolidate_accounts(folder_path, partition_folder, start_date=range_start, end_date=range_end)
+    if not results:
+        print("No PDF files found in the specified folder.")
+        return
+
+    for result in results:
+        print(f"Account {result['account']}: {len(result['summaries'])} statements, "
+              f"{result['rows']} transactions -> {result['path']}")
+        for pdf_path, error in result['failures']:
+            print(f"  Warning: Failed to process {pdf_path}: {error}")
+
+    report_path = os.path.join(partition_folder, 'consolidated.csv')
+    rows = write_consolidated_report([(result['account'], result['path']) for result in results], report_path)
+    print(f"Consolidated {rows} transactions across {len(results)} accounts -> {report_path}")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
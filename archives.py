@@ -0,0 +1,95 @@
+"""
+Streams statement PDFs out of folders and zip/tar bundles without extracting them to disk.
+"""
+import io
+import os
+import tarfile
+import zipfile
+
+# Separates an archive name from the member path in a source name
+MEMBER_SEPARATOR = '!'
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Function to classify a file name as pdf, zip, tar or something to skip
+def source_kind(name):
+    lower = name.lower()
+    if lower.endswith('.pdf'):
+        return 'pdf'
+    if lower.endswith('.zip'):
+        return 'zip'
+    if lower.endswith(TAR_SUFFIXES):
+        return 'tar'
+    return None
+
+# Function to yield (name, bytes) for every PDF inside a zip archive, recursing into nested archives
+def iter_zip_members(archive_name, fileobj, name_filter=None):
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            kind = None if info.is_dir() else source_kind(info.filename)
+            if _wanted(info.filename, kind, name_filter):
+                yield from _iter_member(archive_name, info.filename, kind, lambda: archive.read(info), name_filter)
+
+# Function to yield (name, bytes) for every PDF inside a tar archive, recursing into nested archives
+def iter_tar_members(archive_name, fileobj, name_filter=None):
+    with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+        for info in archive:
+            kind = source_kind(info.name) if info.isfile() else None
+            if _wanted(info.name, kind, name_filter):
+                yield from _iter_member(archive_name, info.name, kind, lambda: archive.extractfile(info).read(), name_filter)
+
+# PDFs are pruned by name before any bytes are read; archives are always opened
+def _wanted(name, kind, name_filter):
+    if kind == 'pdf':
+        return name_filter is None or name_filter(os.path.basename(name))
+    return kind is not None
+
+def _iter_member(archive_name, member_name, kind, read_member, name_filter):
+    name = f"{archive_name}{MEMBER_SEPARATOR}{member_name}"
+    try:
+        data = read_member()
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as error:
+        yield name, error
+        return
+    if kind == 'pdf':
+        yield name, data
+    else:
+        yield from iter_archive(name, io.BytesIO(data), kind, name_filter)
+
+# Function to yield (name, bytes) for the PDFs in an archive, reporting a corrupt archive as an error
+def iter_archive(archive_name, fileobj, kind, name_filter=None):
+    try:
+        if kind == 'zip':
+            yield from iter_zip_members(archive_name, fileobj, name_filter)
+        else:
+            yield from iter_tar_members(archive_name, fileobj, name_filter)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as error:
+        yield archive_name, error
+
+# Function to walk folders and archives, yielding (name, bytes or error) for every statement PDF
+# name_filter, if given, is called with each PDF's base name and skips the PDF when it returns False
+def iter_statement_sources(path, name_filter=None):
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir() or source_kind(entry.name):
+                    yield from iter_statement_sources(entry.path, name_filter)
+        return
+
+    kind = source_kind(path)
+    if not _wanted(path, kind, name_filter):
+        return
+    try:
+        if kind == 'pdf':
+            with open(path, 'rb') as pdf_file:
+                yield path, pdf_file.read()
+        else:
+            with open(path, 'rb') as archive_file:
+                yield from iter_archive(path, archive_file, kind, name_filter)
+    except OSError as error:
+        yield path, error
+
+# Function to split a source name into its archive (or None) and member path
+def split_source_name(name):
+    archive_name, _, member_name = name.rpartition(MEMBER_SEPARATOR)
+    return (archive_name or None), member_name
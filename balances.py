@@ -0,0 +1,199 @@
+"""
+Folder-wide balance report and continuity checks from the account summaries alone, read in
+summary-only mode and cached.
+"""
+import os
+import csv
+import json
+from datetime import datetime, timedelta
+from money import Money
+from bankstats13 import SUMMARY_PATTERNS, index_statements, extract_account_summary
+from accounts import UNKNOWN_ACCOUNT, detect_account
+from workers import WorkerPool
+from pipeline import FILE_TIMEOUT, FILE_MEMORY_LIMIT_MB
+
+# Where summaries are cached, keyed by path and checked against the file's size and mtime
+SUMMARY_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'bankstat', 'summaries.json')
+
+AMOUNT_FIELDS = [key for key in SUMMARY_PATTERNS if key != 'statement_period']
+REPORT_COLUMNS = ['statement', 'account', 'statement_period', *AMOUNT_FIELDS, 'pages_read', 'status']
+
+def load_summary_cache(cache_path=SUMMARY_CACHE):
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+def save_summary_cache(cache, cache_path=SUMMARY_CACHE):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(f"{cache_path}.tmp", 'w', encoding='utf-8') as cache_file:
+        json.dump(cache, cache_file, indent=1, sort_keys=True)
+    os.replace(f"{cache_path}.tmp", cache_path)
+
+# Function to read one statement's summary and account number in summary-only mode (runs in a worker process)
+# Amounts are returned as plain strings so the result can go straight into the JSON cache
+def read_summary(pdf_path):
+    summary, pages, first_page = extract_account_summary(pdf_path)
+    return {'summary': {key: value if key == 'statement_period' else f"{value:.2f}" for key, value in summary.items()},
+            'pages': pages, 'account': detect_account(first_page)}
+
+# Function to key a statement in the cache by its real path, so the same file is found whatever
+# folder path (relative or absolute) it was reached through
+def cache_key(pdf_path):
+    return os.path.realpath(pdf_path)
+
+# Function to tell whether a cache entry still describes the file; entries cached before account
+# numbers were recorded are read again
+def cache_current(entry, stat):
+    return (entry is not None and 'account' in entry
+            and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns)
+
+# Function to check a summary: all fields present and opening + credits - debits = closing
+def summary_status(summary):
+    missing = [key for key in SUMMARY_PATTERNS if key not in summary]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    expected = summary['opening_balance'] + summary['total_credits'] - summary['total_debits']
+    if expected != summary['closing_balance']:
+        return f"does not reconcile (expected closing {expected})"
+    return 'ok'
+
+# Function to load every statement's summary, from the cache where the file is unchanged
+# Returns (start, end, path, summary with Money amounts, pages read, error, account) in period order
+def collect_summaries(folder_path, workers=None, cache_path=SUMMARY_CACHE, start_date=None, end_date=None):
+    statements = index_statements(folder_path, start_date, end_date)
+    cache = load_summary_cache(cache_path)
+    results = {}
+    pending = {}
+    with WorkerPool(workers, task_timeout=FILE_TIMEOUT, memory_limit_mb=FILE_MEMORY_LIMIT_MB) as pool:
+        for _, _, pdf_path in statements:
+            stat = os.stat(pdf_path)
+            entry = cache.get(cache_key(pdf_path))
+            if cache_current(entry, stat):
+                results[pdf_path] = (entry, None)
+            else:
+                pending[pdf_path] = (stat, pool.submit(read_summary, pdf_path))
+        for pdf_path, (stat, future) in pending.items():
+            try:
+                entry = dict(future.result(), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            except Exception as error:
+                results[pdf_path] = (None, error)
+                continue
+            cache[cache_key(pdf_path)] = entry
+            results[pdf_path] = (entry, None)
+    if pending:
+        save_summary_cache(cache, cache_path)
+
+    return [summary_row(start, end, pdf_path, *results[pdf_path]) for start, end, pdf_path in statements]
+
+# Function to turn a cache entry (or an error) into a (start, end, path, summary, pages, error, account) row
+def summary_row(start, end, pdf_path, entry, error):
+    if error is not None:
+        return (start, end, pdf_path, {}, 0, error, UNKNOWN_ACCOUNT)
+    summary = {key: value if key == 'statement_period' else Money.parse(value)
+               for key, value in entry['summary'].items()}
+    return (start, end, pdf_path, summary, entry['pages'], None, entry['account'])
+
+# Function to load the summaries of a folder's statements from the cache alone, never opening a PDF
+# Statements that are not cached, or have changed since, come back with an error
+def load_cached_summaries(folder_path, cache_path=SUMMARY_CACHE, start_date=None, end_date=None):
+    cache = load_summary_cache(cache_path)
+    summaries = []
+    for start, end, pdf_path in index_statements(folder_path, start_date, end_date):
+        entry = cache.get(cache_key(pdf_path))
+        if not cache_current(entry, os.stat(pdf_path)):
+            summaries.append(summary_row(start, end, pdf_path, None, LookupError("summary not cached")))
+        else:
+            summaries.append(summary_row(start, end, pdf_path, entry, None))
+    return summaries
+
+# Function to check each account's consecutive statements, ordered by their filename periods: each
+# closing balance must equal the next opening balance, and the periods must follow on without gaps
+# or overlaps; statements whose account could not be read are chained together
+# Returns (problem, statement, next statement, detail) tuples
+def check_continuity(summaries):
+    problems = []
+    chains = {}
+    for row in summaries:
+        if row[0] is None or row[1] is None:
+            problems.append(('no period', row[2], None, "period not in filename"))
+        else:
+            chains.setdefault(row[6], []).append(row)
+    for account, dated in sorted(chains.items()):
+        dated.sort(key=lambda row: (row[0], row[1]))
+        for previous, current in zip(dated, dated[1:]):
+            problems.extend(check_pair(previous, current))
+    return problems
+
+# Function to check one statement against the next statement of the same account
+def check_pair(previous, current):
+    problems = []
+    _, previous_end, previous_path, previous_summary = previous[:4]
+    start, _, path, summary = current[:4]
+    if start > previous_end + timedelta(days=1):
+        problems.append(('gap', previous_path, path, f"no statement for {previous_end + timedelta(days=1):%d %b %Y} - "
+                                                     f"{start - timedelta(days=1):%d %b %Y}"))
+    elif start <= previous_end:
+        problems.append(('overlap', previous_path, path, f"periods overlap from {start:%d %b %Y}"))
+    closing, opening = previous_summary.get('closing_balance'), summary.get('opening_balance')
+    if closing is None or opening is None:
+        problems.append(('unchecked', previous_path, path, "closing or opening balance unavailable"))
+    elif closing != opening:
+        problems.append(('balance mismatch', previous_path, path,
+                         f"closing {closing} but next opening {opening} (difference {opening - closing})"))
+    return problems
+
+# Function to build the balance report rows, one per statement
+def balance_report(summaries):
+    rows = []
+    for _, _, pdf_path, summary, pages, error, account in summaries:
+        row = {'statement': pdf_path, 'account': account, 'statement_period': summary.get('statement_period', ''),
+               'pages_read': pages}
+        row.update({key: f"{summary[key]:.2f}" if key in summary else '' for key in AMOUNT_FIELDS})
+        row['status'] = f"error: {error}" if error is not None else summary_status(summary)
+        rows.append(row)
+    return rows
+
+def write_balance_report(rows, report_path):
+    with open(report_path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# Main execution function
+def main():
+    folder_path = input("Enter the folder path containing bank statements: ")
+    report_path = input("Enter the path for the balance report CSV: ") or os.path.join(folder_path, 'balances.csv')
+    date_range = input("Enter a date range to report (DD/MM/YYYY - DD/MM/YYYY), or leave blank for all: ").strip()
+    range_start = range_end = None
+    if date_range:
+        range_start, range_end = (datetime.strptime(d.strip(), '%d/%m/%Y') for d in date_range.split('-'))
+
+    cached_only = input("Use cached summaries only, without opening any PDFs? (yes/no): ").lower() == 'yes'
+
+    if cached_only:
+        summaries = load_cached_summaries(folder_path, start_date=range_start, end_date=range_end)
+    else:
+        summaries = collect_summaries(folder_path, start_date=range_start, end_date=range_end)
+    if not summaries:
+        print("No PDF files found in the specified folder.")
+        return
+    rows = balance_report(summaries)
+    write_balance_report(rows, report_path)
+
+    for row in rows:
+        print(f"{os.path.relpath(row['statement'], folder_path)}: opening {row['opening_balance'] or '-'}, "
+              f"closing {row['closing_balance'] or '-'} [{row['status']}]")
+    problems = sum(1 for row in rows if row['status'] != 'ok')
+    print(f"\n{len(rows)} statements, {problems} with problems. Report written to {report_path}")
+
+    continuity = check_continuity(summaries)
+    print(f"\nContinuity: {len(continuity)} problems")
+    for problem, pdf_path, next_path, detail in continuity:
+        names = os.path.relpath(pdf_path, folder_path) + (f" -> {os.path.relpath(next_path, folder_path)}" if next_path else '')
+        print(f"  {problem}: {names}: {detail}")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
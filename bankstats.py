@@ -3,6 +3,7 @@ import tabula
 import os
 import re
 from datetime import datetime
+from money import Money, ZERO
 import pandas as pd
 
 def get_pdf_files(folder_path):
@@ -62,7 +63,7 @@ def main():
         print("PDF conversion and analysis skipped.")
 
 def finance_manager(file):
-    sum = 0
+    sum = ZERO
     transactions = []
     with open(file, mode='r') as csv_file:
         csv_reader = csv.reader(csv_file)
@@ -72,7 +73,7 @@ def finance_manager(file):
             try:
                 date = row[1] if len(row) > 1 else ''
                 name = row[2] if len(row) > 2 else ''
-                amount = float(row[4].replace(',', '')) if len(row) > 4 and row[4] else 0
+                amount = Money.parse(row[4]) if len(row) > 4 and row[4] else ZERO
 
                 transaction = (date, name, amount)
                 sum += amount
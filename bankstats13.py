@@ -4,67 +4,140 @@ Imports the os module, which provides a way to interact with the operating syste
 import os
 import pandas as pd
 import tabula
-from datetime import datetime
 import pdfplumber
+from datetime import datetime
 import re
-from decimal import Decimal, InvalidOperation
+from bisect import bisect_right
+from money import Money, ZERO, cents_array
+from dates import parse_statement_date, parse_period_date
+from pdfaccess import MappedPDF
+from extractors import get_extractor, probe_page_spans
+from layouts import COLUMN_HEADERS, DEFAULT_LAYOUT, detect_page_layout, has_amount_columns
+from exporters import TransactionExporter
+from payees import get_registry
+
+# Matches a whole transaction date cell, and a money amount cell such as "1,234.56", "12.00*" or "5.00-"
+TRANSACTION_DATE = re.compile(r'\d{2}/\d{2}/\d{4}')
+MONEY_AMOUNT = re.compile(r'-?[\d,]*\d\.\d{2}[*-]?')
+
+# Layout columns that hold amounts rather than text
+AMOUNT_COLUMNS = ('fees', 'debit', 'credit', 'balance', 'amount')
+
+# Fixed schema every tabula table is normalized to before it is appended to the CSV
+TABLE_COLUMNS = list(dict.fromkeys(COLUMN_HEADERS.values()))
+
+# Currency suffix on a table header, e.g. the " (R)" in "Debits (R)"
+HEADER_SUFFIX = re.compile(r'\s*\(.*\)$')
 
 # Function to get PDF files from a folder
 def get_pdf_files(folder_path):
     return [f for f in os.listdir(folder_path) if f.endswith('.pdf')]
 
 # Function to parse PDF filename for dates
+# A name shaped like a period but with an impossible date (e.g. "31 Sep 2022") counts as having no period
 def parse_pdf_name(pdf_name):
     pattern = r'(\d{2}\s\w{3}\s\d{4})\s-\s(\d{2}\s\w{3}\s\d{4})\.pdf'
     match = re.match(pattern, pdf_name)
     if match:
-        start_date = datetime.strptime(match.group(1), '%d %b %Y')
-        end_date = datetime.strptime(match.group(2), '%d %b %Y')
+        try:
+            start_date = parse_period_date(match.group(1))
+            end_date = parse_period_date(match.group(2))
+        except ValueError:
+            return None, None
         return start_date, end_date
     return None, None
 
-# Function to extract text from all pages of a PDF
-def extract_pdf_content(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        return "\n".join(page.extract_text() for page in pdf.pages)
+# Function to check whether a statement period overlaps a requested date range
+def period_overlaps(period_start, period_end, start_date=None, end_date=None):
+    if start_date is None and end_date is None:
+        return True
+    if period_start is None or period_end is None:
+        return False
+    return (end_date is None or period_start <= end_date) and (start_date is None or period_end >= start_date)
+
+# Function to build a date-sorted index of the statements in a folder tree, pruned by filename dates
+def index_statements(folder_path, start_date=None, end_date=None):
+    index = []
+    folders = [folder_path]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    folders.append(entry.path)
+                elif entry.name.endswith('.pdf'):
+                    period_start, period_end = parse_pdf_name(entry.name)
+                    if period_overlaps(period_start, period_end, start_date, end_date):
+                        index.append((period_start, period_end, entry.path))
+    # Statements without a parsable period sort last
+    index.sort(key=lambda s: (s[0] is None, s[0] or datetime.min, s[2]))
+    return index
+
+# Function to extract text from the pages of a PDF with the chosen extractor backend
+# With a date range, pages wholly outside it are skipped; pages without a text layer fall back to OCR
+def extract_pdf_content(pdf_path, start_date=None, end_date=None, chronological=None, ocr=True, backend=None):
+    return get_extractor(backend).extract(pdf_path, start_date, end_date, chronological, ocr)
+
+# Function to extract each page's words as lines with x-coordinates (pdfplumber only)
+def extract_pdf_lines(pdf_path, start_date=None, end_date=None, chronological=None):
+    return get_extractor('pdfplumber').extract_lines(pdf_path, start_date, end_date, chronological)
+
+# Function to rebuild plain text from extracted lines for the summary parser
+def lines_to_text(pages_lines):
+    return "\n".join(" ".join(word['text'] for word in line) for lines in pages_lines for line in lines)
+
+# Patterns for the five account summary fields
+SUMMARY_PATTERNS = {
+    'statement_period': re.compile(r'Statement period:?\s*(.*)', re.IGNORECASE),
+    'opening_balance': re.compile(r'Opening balance:?\s*([-\d,.]+)', re.IGNORECASE),
+    'closing_balance': re.compile(r'Closing balance:?\s*([-\d,.]+)', re.IGNORECASE),
+    'total_credits': re.compile(r'Total (Funds Received|Credits):?\s*([-\d,.]+)', re.IGNORECASE),
+    'total_debits': re.compile(r'Total (Funds used|Debits):?\s*([-\d,.]+)', re.IGNORECASE),
+}
 
 # Function to parse the account summary section
 def parse_account_summary(content):
     summary = {}
-    patterns = {
-        'statement_period': r'Statement period:?\s*(.*)',
-        'opening_balance': r'Opening balance:?\s*([-\d,.]+)',
-        'closing_balance': r'Closing balance:?\s*([-\d,.]+)',
-        'total_credits': r'Total (Funds Received|Credits):?\s*([-\d,.]+)',
-        'total_debits': r'Total (Funds used|Debits):?\s*([-\d,.]+)',
-    }
-    for key, pattern in patterns.items():
-        match = re.search(pattern, content, re.IGNORECASE)
+    for key, pattern in SUMMARY_PATTERNS.items():
+        match = pattern.search(content)
         if match:
-            value = match.group(1) if key == 'statement_period' else match.group(2)
-            value = value.replace(',', '')
-            summary[key] = Decimal(value) if key != 'statement_period' else value
+            value = match.group(match.lastindex)
+            if key == 'statement_period':
+                summary[key] = value
+                continue
+            try:
+                summary[key] = Money.parse(value)
+            except ValueError:
+                print(f"Warning: Invalid amount format for {key.replace('_', ' ')}: {value}")
     return summary
 
+# Function to read only as many pages as it takes to find all the summary fields
+# Returns the summary, the number of pages read and the first page's text, which holds the header
+def extract_account_summary(pdf_path, ocr=True, backend=None):
+    summary = {}
+    pages = 0
+    first_page = ''
+    for text in get_extractor(backend).iter_page_texts(pdf_path, ocr):
+        if not pages:
+            first_page = text
+        pages += 1
+        for key, value in parse_account_summary(text).items():
+            summary.setdefault(key, value)
+        if len(summary) == len(SUMMARY_PATTERNS):
+            break
+    return summary, pages, first_page
 
-# Function to parse the transaction list
 
-def parse_transactions(content, start_date, end_date):
-    transactions = []
+# Function to yield transactions in statement order as they are matched, without building a list
+
+def iter_transactions(content, start_date, end_date, pattern=DEFAULT_LAYOUT['transaction_pattern']):
     #pattern = r'(\d{2}/\d{2}/\d{4})\s+(.*?)\s+([-\d,.]+\*?)\s*([-\d,.]*)'
-    pattern = r'(\d{2}/\d{2}/\d{4})\s+(.*?)\s+([-\d,.]+)(?:\s+([-\d,.]+))?$'
-    matches = re.findall(pattern, content, re.MULTILINE)
-    
-    for match in matches:
-        date, description, amount1, amount2 = match
-        transaction_date = datetime.strptime(date, '%d/%m/%Y')
+    for match in re.finditer(pattern, content, re.MULTILINE):
+        date, description, amount1, amount2 = match.groups(default='')
+        transaction_date = parse_statement_date(date)
         
         if start_date <= transaction_date <= end_date:
             try:
                 description = ' '.join(description.split())  # Normalize whitespace
-                debit = Decimal('0')
-                credit = Decimal('0')
-                
                 # Check if description contains an amount with asterisk
                 desc_parts = description.split()
                 if desc_parts and desc_parts[-1].endswith('*') and desc_parts[-1].replace('.', '').replace(',', '').rstrip('*').isdigit():
@@ -74,54 +147,164 @@ def parse_transactions(content, start_date, end_date):
                     amount2 = ''  # Clear amount2 to ensure it's treated as a single amount transaction
 
                 
-                # Remove asterisk if present in either amount
-                amount1 = amount1.rstrip('*')  
-                amount2 = amount2.rstrip('*') if amount2 else ''
+                # Money.parse drops the asterisk marker from either amount
+                debit = Money.parse(amount1)
+                credit = Money.parse(amount2) if amount2 else ZERO
                 
-                if amount2:
-                    debit = Decimal(amount1.replace(',', ''))
-                    credit = Decimal(amount2.replace(',', ''))
-                else:
-                    amount = Decimal(amount1.replace(',', ''))
-                    debit = amount
-                    credit = Decimal('0')
-                
-                transactions.append((date, description, debit, credit))
-            except InvalidOperation:
+                yield (date, description, debit, credit)
+            except ValueError:
                 print(f"Warning: Invalid amount format for transaction on {date}")
+
+# Function to parse the transaction list
+
+def parse_transactions(content, start_date, end_date, pattern=DEFAULT_LAYOUT['transaction_pattern']):
+    transactions = list(iter_transactions(content, start_date, end_date, pattern))
+    transactions.sort(key=lambda x: parse_statement_date(x[0]))
     
-    transactions.sort(key=lambda x: datetime.strptime(x[0], '%d/%m/%Y'))
-    
     return transactions
 
 
+# Function to parse transactions by placing each amount in the layout column under which it sits
+# One right-to-left pass per line: trailing money-formatted words are matched to amount columns by
+# their right edge (amounts are right-aligned), each column at most once; the rest is description
+def parse_transactions_by_columns(pages_lines, start_date, end_date, columns):
+    transactions = []
+    names = [column[0] for column in columns]
+    lefts = [column[1] for column in columns]
+
+    for lines in pages_lines:
+        for line in lines:
+            date = line[0]['text']
+            if not TRANSACTION_DATE.fullmatch(date):
+                continue
+            transaction_date = parse_statement_date(date)
+            if not start_date <= transaction_date <= end_date:
+                continue
+
+            words = line[1:]
+            amounts = {}
+            while words and MONEY_AMOUNT.fullmatch(words[-1]['text']):
+                column = names[max(bisect_right(lefts, words[-1]['x1']) - 1, 0)]
+                if column not in AMOUNT_COLUMNS or column in amounts:
+                    break
+                amounts[column] = words.pop()['text']
+            description = ' '.join(word['text'] for word in words)
+
+            try:
+                debit = abs(Money.parse(amounts['debit'])) if 'debit' in amounts else ZERO
+                credit = Money.parse(amounts['credit']) if 'credit' in amounts else ZERO
+                if 'amount' in amounts:
+                    amount = Money.parse(amounts['amount'])
+                    if amount < ZERO:
+                        debit += -amount
+                    else:
+                        credit += amount
+            except ValueError:
+                print(f"Warning: Invalid amount format for transaction on {date}")
+                continue
+            transactions.append((date, description, debit, credit))
+
+    transactions.sort(key=lambda x: parse_statement_date(x[0]))
+    return transactions
+
+# Function to extract and parse one statement (a path or a seekable file-like object), opening it once
+# The first page's layout decides the parser: amounts are placed by x-coordinate when the layout has
+# Debit/Credit/Amount columns, and matched with the layout's regex otherwise
+# Start or end dates of None leave that end of the period open; returns (summary, transactions)
+def parse_statement(source, start_date=None, end_date=None, backend=None):
+    plumber = get_extractor('pdfplumber')
+    period_start, period_end = start_date or datetime.min, end_date or datetime.max
+    # Page dates are probed through PDFium before pdfplumber holds the file open
+    spans = probe_page_spans(source) if start_date is not None or end_date is not None else None
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    content = None
+    with pdfplumber.open(source) as pdf:
+        layout = detect_page_layout(pdf.pages[0])
+        if has_amount_columns(layout):
+            pages_lines = plumber.pdf_lines(pdf, start_date, end_date, spans=spans)
+            transactions = parse_transactions_by_columns(pages_lines, period_start, period_end, layout['columns'])
+            return parse_account_summary(lines_to_text(pages_lines)), transactions
+        if get_extractor(backend) is plumber:
+            content = plumber.pdf_text(pdf, start_date, end_date, spans=spans)
+    if content is None:
+        content = extract_pdf_content(source, start_date, end_date, backend=backend)
+    return parse_account_summary(content), parse_transactions(content, period_start, period_end, layout['transaction_pattern'])
+
+# Function to keep a spread from reaching zero: at least 1% of the centre, and never under one cent,
+# so a payee that always charges the same amount is still flagged when the amount jumps
+def spread_floor(spread, centre):
+    return spread.clip(lower=(centre.abs() * 0.01).clip(lower=0.01))
+
+# Function to flag unusual transactions per payee and per month
+# Payees are grouped by their integer ids from the payee registry rather than by description strings
+def detect_anomalies(transactions, window=6, threshold=3.0, payees=None):
+    columns = ['date', 'description', 'column', 'amount', 'reason']
+    if not transactions:
+        return pd.DataFrame(columns=columns)
+
+    # Amounts enter pandas as int64 cents and become rands only for the statistics
+    df = pd.DataFrame({'date': [t[0] for t in transactions], 'description': [t[1] for t in transactions],
+                       'debit': cents_array(t[2] for t in transactions) / 100,
+                       'credit': cents_array(t[3] for t in transactions) / 100})
+    df['date'] = pd.to_datetime(df['date'], format='%d/%m/%Y')
+    payees = payees or get_registry()
+    df['payee'] = [payees.payee_id(description) for description in df['description']]
+
+    # One row per non-zero debit or credit amount, in date order
+    ledger = df.melt(id_vars=['date', 'description', 'payee'], value_vars=['debit', 'credit'],
+                     var_name='column', value_name='amount')
+    ledger = ledger[ledger['amount'] != 0].sort_values('date', kind='stable').reset_index(drop=True)
+    if ledger.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Rolling statistics over each payee's previous transactions (current row excluded)
+    keys = [ledger['payee'], ledger['column']]
+    rolling = ledger.groupby(keys)['amount'].rolling(window, min_periods=3)
+    prior_mean = rolling.mean().groupby(level=[0, 1]).shift().reset_index(level=[0, 1], drop=True)
+    prior_std = rolling.std().groupby(level=[0, 1]).shift().reset_index(level=[0, 1], drop=True)
+    payee_z = (ledger['amount'] - prior_mean) / spread_floor(prior_std, prior_mean)
+    payee_flag = payee_z > threshold
+
+    # Robust z-score against the rest of the month's transactions in the same column
+    month_keys = [ledger['date'].dt.to_period('M'), ledger['column']]
+    month_median = ledger.groupby(month_keys)['amount'].transform('median')
+    deviation = ledger['amount'] - month_median
+    month_mad = deviation.abs().groupby(month_keys).transform('median') * 1.4826
+    month_flag = (deviation / spread_floor(month_mad, month_median)) > threshold * 2
+
+    ledger['reason'] = ''
+    ledger.loc[month_flag, 'reason'] = 'large for month'
+    ledger.loc[payee_flag, 'reason'] = 'unusual for payee'
+    ledger.loc[payee_flag & month_flag, 'reason'] = 'unusual for payee, large for month'
+    flagged = ledger[payee_flag | month_flag]
+    flagged = flagged.assign(date=flagged['date'].dt.strftime('%d/%m/%Y'))
+    return flagged[columns].reset_index(drop=True)
+
 
 # Main function to manage the finance data
 def finance_manager(pdf_path, start_date, end_date):
-    content = extract_pdf_content(pdf_path)
-    summary = parse_account_summary(content)
-    transactions = parse_transactions(content, start_date, end_date)
-    
-    
-    # Extract content from PDF
-    content = extract_pdf_content(pdf_path)
-    
-    # Parse account summary and transactions
-    summary = parse_account_summary(content)
-    transactions = parse_transactions(content, start_date, end_date)
+    # Parse with the statement's layout: coordinate-based columns where known, its regex otherwise
+    summary, transactions = parse_statement(pdf_path, start_date, end_date)
 
     # Validate extracted data
     if 'opening_balance' not in summary or 'closing_balance' not in summary:
         print("Warning: Opening or closing balance not found in the statement.")
     
     # Calculate and validate totals
-    calculated_total_debits = sum(t[2] for t in transactions)
-    calculated_total_credits = sum(t[3] for t in transactions)
-    if 'total_debits' in summary and abs(calculated_total_debits - summary['total_debits']) > Decimal('0.01'):
+    calculated_total_debits = Money.total(t[2] for t in transactions)
+    calculated_total_credits = Money.total(t[3] for t in transactions)
+    if 'total_debits' in summary and abs(calculated_total_debits - summary['total_debits']) > Money(1):
         print(f"Warning: Calculated total debits ({calculated_total_debits}) doesn't match statement ({summary['total_debits']})")
-    if 'total_credits' in summary and abs(calculated_total_credits - summary['total_credits']) > Decimal('0.01'):
+    if 'total_credits' in summary and abs(calculated_total_credits - summary['total_credits']) > Money(1):
         print(f"Warning: Calculated total credits ({calculated_total_credits}) doesn't match statement ({summary['total_credits']})")
 
+    # Flag unusually large or out-of-pattern transactions
+    anomalies = detect_anomalies(transactions)
+    get_registry().save()
+    for anomaly in anomalies.itertuples(index=False):
+        print(f"Warning: Unusual {anomaly.column} on {anomaly.date}: {anomaly.description} R{anomaly.amount:.2f} ({anomaly.reason})")
+
     # Print summary and transactions
     print("Account Summary:")
     for key, value in summary.items():
@@ -133,23 +316,67 @@ def finance_manager(pdf_path, start_date, end_date):
 
     return summary, transactions
 
+# Function to map a tabula table's columns onto TABLE_COLUMNS, or None if its header is not recognised
+def table_column_names(table):
+    names = [COLUMN_HEADERS.get(HEADER_SUFFIX.sub('', str(column)).strip(' :').lower()) for column in table.columns]
+    recognised = [name for name in names if name]
+    if len(recognised) < 2 or len(set(recognised)) != len(recognised):
+        return None
+    return names
+
+# Function to normalize one tabula table to TABLE_COLUMNS
+# Continuation pages often come back without a header, in which case tabula has taken the first
+# transaction as the header; such tables reuse the previous header's columns by position
+def normalize_table(table, previous_names=None):
+    names = table_column_names(table)
+    if names is None:
+        if previous_names is None or len(previous_names) != len(table.columns):
+            return None, previous_names
+        # Blank cells in the taken row came back as "Unnamed: n" column names
+        first_row = [None if str(column).startswith('Unnamed') else column for column in table.columns]
+        table = pd.concat([pd.DataFrame([first_row], columns=table.columns), table], ignore_index=True)
+        names = previous_names
+    table = table.set_axis([name or f"_unused{i}" for i, name in enumerate(names)], axis=1)
+    return table.reindex(columns=TABLE_COLUMNS), names
+
+# Function to write every page's tables to one CSV with a fixed schema, a table at a time
+# One tabula call reads all pages, so the JVM parses the PDF once; the tables are normalized and
+# appended one by one, with no concat copy of the whole statement
+def write_tables_csv(pdf_path, csv_path):
+    rows = skipped = 0
+    names = None
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
+        pd.DataFrame(columns=TABLE_COLUMNS).to_csv(csv_file, index=False)
+        for table in tabula.read_pdf(pdf_path, pages='all', multiple_tables=True):
+            table, names = normalize_table(table, names)
+            if table is None:
+                skipped += 1
+                continue
+            table.to_csv(csv_file, header=False, index=False)
+            rows += len(table)
+    if skipped:
+        print(f"Warning: Skipped {skipped} tables without a recognised header.")
+    return rows
+
 # Main execution function
 def main():
     folder_path = input("Enter the folder path containing bank statements: ")
-    pdf_files = get_pdf_files(folder_path)
+    date_range = input("Enter a date range to list (DD/MM/YYYY - DD/MM/YYYY), or leave blank for all: ").strip()
+    range_start = range_end = None
+    if date_range:
+        range_start, range_end = (datetime.strptime(d.strip(), '%d/%m/%Y') for d in date_range.split('-'))
+    statements = index_statements(folder_path, range_start, range_end)
 
-    if not pdf_files:
+    if not statements:
         print("No PDF files found in the specified folder.")
         return
 
     print("Available PDF files:")
-    for i, pdf in enumerate(pdf_files, 1):
-        print(f"{i}. {pdf}")
+    for i, (_, _, path) in enumerate(statements, 1):
+        print(f"{i}. {os.path.relpath(path, folder_path)}")
 
     selection = int(input("Select a PDF file number: ")) - 1
-    selected_pdf = pdf_files[selection]
-
-    start_date, end_date = parse_pdf_name(selected_pdf)
+    start_date, end_date, pdf_path = statements[selection]
     if start_date and end_date:
         print(f"Selected statement period: {start_date.strftime('%d %B %Y')} to {end_date.strftime('%d %B %Y')}")
     else:
@@ -158,19 +385,22 @@ def main():
     convert_option = input("Do you want to convert the PDF to CSV and analyze the data? (yes/no): ").lower()
 
     if convert_option == 'yes':
-        pdf_path = os.path.join(folder_path, selected_pdf)
-        csv_path = os.path.join(folder_path, f"{os.path.splitext(selected_pdf)[0]}.csv")
+        csv_path = f"{os.path.splitext(pdf_path)[0]}.csv"
 
-        # Read PDF and combine all tables
-        dfs = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
-        combined_df = pd.concat(dfs, ignore_index=True)
+        # Map the PDF once; the page-date probe and pdfplumber read from the shared buffer
+        with MappedPDF(pdf_path) as pdf:
+            # Append each of tabula's tables to the CSV in page order
+            rows = write_tables_csv(pdf_path, csv_path)
+            print(f"PDF converted to CSV: {csv_path} ({rows} rows)")
 
-        # Write combined data to CSV
-        combined_df.to_csv(csv_path, index=False)
-        print(f"PDF converted to CSV: {csv_path}")
+            # Analyze the CSV data
+            summary, transactions = finance_manager(pdf.stream(), start_date, end_date)
 
-        # Analyze the CSV data
-        summary, transactions = finance_manager(pdf_path, start_date, end_date)
+        # Export the cleaned transactions alongside the raw table dump
+        export_csv_path = f"{os.path.splitext(pdf_path)[0]}.transactions.csv"
+        with TransactionExporter(export_csv_path) as exporter:
+            exporter.write_statement(os.path.basename(pdf_path), summary, transactions)
+        print(f"Cleaned transactions exported: {export_csv_path}")
         
         # Print summary and transactions
         print("Transactions:")
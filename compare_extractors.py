@@ -0,0 +1,64 @@
+"""
+Parity check and benchmark of the PDF text extractor backends over a folder of statements.
+"""
+import time
+from datetime import datetime
+from extractors import EXTRACTORS, DEFAULT_EXTRACTOR, get_extractor
+from bankstats13 import index_statements, parse_account_summary, parse_transactions
+
+# Function to run every backend over the statements, comparing parsed output with the first backend
+def compare_extractors(pdf_paths, backends):
+    reference = backends[0]
+    report = {name: {'seconds': 0.0, 'files': 0, 'mismatches': [], 'errors': []} for name in backends}
+    for pdf_path in pdf_paths:
+        parsed = {}
+        for name in backends:
+            started = time.perf_counter()
+            try:
+                content = get_extractor(name).extract(pdf_path, ocr=False)
+            except Exception as error:
+                report[name]['errors'].append((pdf_path, error))
+                continue
+            report[name]['seconds'] += time.perf_counter() - started
+            report[name]['files'] += 1
+            parsed[name] = (parse_account_summary(content), parse_transactions(content, datetime.min, datetime.max))
+        for name in backends[1:]:
+            if name in parsed and reference in parsed and parsed[name] != parsed[reference]:
+                report[name]['mismatches'].append(pdf_path)
+    return report
+
+# Main execution function
+def main():
+    folder_path = input("Enter the folder path containing bank statements: ")
+    pdf_paths = [path for _, _, path in index_statements(folder_path)]
+    if not pdf_paths:
+        print("No PDF files found in the specified folder.")
+        return
+
+    backends = [DEFAULT_EXTRACTOR] + [name for name in EXTRACTORS if name != DEFAULT_EXTRACTOR]
+    report = compare_extractors(pdf_paths, backends)
+
+    print(f"{'Backend':<12} {'Files':>6} {'Seconds':>9} {'Files/s':>8} {'Mismatches':>11} {'Errors':>7}")
+    for name, result in report.items():
+        rate = result['files'] / result['seconds'] if result['seconds'] else 0
+        print(f"{name:<12} {result['files']:>6} {result['seconds']:>9.2f} {rate:>8.1f} {len(result['mismatches']):>11} {len(result['errors']):>7}")
+        for pdf_path in result['mismatches']:
+            print(f"  differs from {backends[0]}: {pdf_path}")
+        for pdf_path, error in result['errors']:
+            print(f"  failed on {pdf_path}: {error}")
+
+    # Statements the reference backend cannot read are left out of the comparison
+    unreadable = {pdf_path for pdf_path, _ in report[backends[0]]['errors']}
+    if len(unreadable) == len(pdf_paths):
+        print(f"\nNo statement could be read with {backends[0]}, so no backend is recommended.")
+        return
+    candidates = [name for name, result in report.items()
+                  if not result['mismatches'] and all(pdf_path in unreadable for pdf_path, _ in result['errors'])]
+    fastest = min(candidates, key=lambda name: report[name]['seconds'])
+    print(f"\nFastest backend with identical output: {fastest} (set BANKSTAT_EXTRACTOR={fastest} to use it)")
+    # Layouts with known Debit/Credit columns are parsed from word coordinates, which only pdfplumber provides
+    print("BANKSTAT_EXTRACTOR applies to the text parser only; statements with recognised columns always use pdfplumber.")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Differential runner for the bankstats parser versions over a corpus of statements.
+
+The corpus is a folder of statement PDFs and/or extracted .txt files. A <name>.expected.json file
+next to a statement holds its ground truth; otherwise the reference version's output is used.
+"""
+import os
+import json
+import time
+import random
+import difflib
+import inspect
+import importlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Parser versions that define parse_transactions and parse_account_summary
+PARSER_VERSIONS = ['bankstats4', 'bankstats5', 'bankstats6', 'bankstats7', 'bankstats8', 'bankstats9',
+                   'bankstats10', 'bankstats11', 'bankstats12', 'bankstats13']
+REFERENCE_VERSION = 'bankstats13'
+
+# Function to import a parser version, returning None with a warning if it cannot be imported cleanly
+def load_parser(version):
+    try:
+        module = importlib.import_module(version)
+    except Exception as error:
+        print(f"Warning: Skipping {version}: import failed ({error!r})")
+        return None
+    if not hasattr(module, 'parse_transactions') or not hasattr(module, 'parse_account_summary'):
+        print(f"Warning: Skipping {version}: no parse_transactions/parse_account_summary")
+        return None
+    return module
+
+# Function to format an amount the same way whatever numeric type a version returns (float, Decimal or Money)
+def canonical_amount(value):
+    if isinstance(value, float):
+        value = Decimal(str(value))
+    return f"{value:.2f}"
+
+# Function to reduce a version's transaction tuple to (date, description, debit, credit) strings
+# Older versions return (date, description, fees, debits, credits); fees are dropped
+def canonical_row(row):
+    date, description, *amounts = row
+    if len(amounts) == 3:
+        amounts = amounts[1:]
+    return (date, ' '.join(str(description).split()), *(canonical_amount(a) for a in amounts))
+
+# Function to run one version's parsers over a statement's text
+def run_parser(module, content):
+    summary = module.parse_account_summary(content)
+    if len(inspect.signature(module.parse_transactions).parameters) >= 3:
+        transactions = module.parse_transactions(content, datetime.min, datetime.max)
+    else:
+        transactions = module.parse_transactions(content)
+    return ({key: value if isinstance(value, str) else canonical_amount(value) for key, value in summary.items()},
+            [canonical_row(row) for row in transactions])
+
+# Function to load the corpus as (name, text, expected or None); PDFs are extracted once, up front
+def load_corpus(corpus_folder):
+    from bankstats13 import extract_pdf_content
+    corpus = []
+    for name in sorted(os.listdir(corpus_folder)):
+        stem, extension = os.path.splitext(name)
+        path = os.path.join(corpus_folder, name)
+        if extension == '.pdf':
+            content = extract_pdf_content(path)
+        elif extension == '.txt':
+            with open(path, encoding='utf-8') as text_file:
+                content = text_file.read()
+        else:
+            continue
+        expected = None
+        expected_path = os.path.join(corpus_folder, f"{stem}.expected.json")
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding='utf-8') as expected_file:
+                data = json.load(expected_file)
+            expected = (data['summary'], [tuple(row) for row in data['transactions']])
+        corpus.append((name, content, expected))
+    return corpus
+
+# Function to count matching rows between two transaction lists and describe the first differences
+def diff_rows(expected_rows, actual_rows, limit=3):
+    matcher = difflib.SequenceMatcher(a=expected_rows, b=actual_rows, autojunk=False)
+    matched = sum(block.size for block in matcher.get_matching_blocks())
+    differences = []
+    for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+        if tag != 'equal' and len(differences) < limit:
+            differences.append((expected_rows[a1:a2][:2], actual_rows[b1:b2][:2]))
+    return matched, differences
+
+# Function to run the chosen versions over the corpus and score accuracy and throughput
+def compare_parsers(corpus, versions, reference=REFERENCE_VERSION, repeat=3):
+    modules = {version: module for version in versions if (module := load_parser(version))}
+    if reference not in modules:
+        modules[reference] = load_parser(reference)
+
+    report = {version: {'rows': 0, 'matched': 0, 'expected': 0, 'summaries': 0, 'errors': 0,
+                        'seconds': 0.0, 'statements': 0, 'differences': []} for version in modules}
+    for name, content, expected in corpus:
+        if expected is None:
+            try:
+                expected = run_parser(modules[reference], content)
+            except Exception as error:
+                print(f"Warning: Reference {reference} failed on {name}: {error!r}")
+                continue
+        for version, module in modules.items():
+            result = report[version]
+            try:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    summary, rows = run_parser(module, content)
+                result['seconds'] += (time.perf_counter() - started) / repeat
+            except Exception as error:
+                result['errors'] += 1
+                result['expected'] += len(expected[1])
+                result['differences'].append((name, f"error: {error!r}"))
+                continue
+            matched, differences = diff_rows(expected[1], rows)
+            result['statements'] += 1
+            result['rows'] += len(rows)
+            result['matched'] += matched
+            result['expected'] += len(expected[1])
+            result['summaries'] += summary == expected[0]
+            result['differences'].extend((name, difference) for difference in differences)
+    return report
+
+# Function to write synthetic statements with known ground truth into a corpus folder
+# Transaction lines use the "date description debit credit" form the text parsers read
+def write_synthetic_corpus(corpus_folder, count, seed=0):
+    os.makedirs(corpus_folder, exist_ok=True)
+    rng = random.Random(seed)
+    for number in range(count):
+        start = datetime(2020, 1, 1) + timedelta(days=30 * number)
+        end = start + timedelta(days=29)
+        balance = Decimal(rng.randint(0, 500000)) / 100
+        opening = balance
+        lines, rows = [], []
+        total_debits = total_credits = Decimal('0')
+        for day in range(30):
+            date = (start + timedelta(days=day)).strftime('%d/%m/%Y')
+            for _ in range(rng.randint(0, 3)):
+                amount = Decimal(rng.randint(100, 500000)) / 100
+                if rng.random() < 0.3:
+                    description = f"SALARY ACME REF {rng.randint(100, 999)}"
+                    balance += amount
+                    total_credits += amount
+                    rows.append((date, description, '0.00', f"{amount:.2f}"))
+                else:
+                    description = f"POS PURCHASE CARD {rng.randint(1000, 9999)} SHOP"
+                    balance -= amount
+                    total_debits += amount
+                    rows.append((date, description, f"{amount:.2f}", '0.00'))
+                # No running balance: without column positions it could not be told from a credit
+                lines.append(f"{date} {description} {rows[-1][2]} {rows[-1][3]}")
+        header = [
+            f"Statement period: {start:%d %b %Y} - {end:%d %b %Y}",
+            f"Opening balance: {opening:,.2f}",
+            f"Closing balance: {balance:,.2f}",
+            f"Total Credits: {total_credits:,.2f}",
+            f"Total Debits: {total_debits:,.2f}",
+            "Date Description Debit Credit",
+        ]
+        stem = f"synthetic-{number:04d}"
+        with open(os.path.join(corpus_folder, f"{stem}.txt"), 'w', encoding='utf-8') as text_file:
+            text_file.write("\n".join(header + lines) + "\n")
+        expected = {
+            'summary': {'statement_period': f"{start:%d %b %Y} - {end:%d %b %Y}",
+                        'opening_balance': f"{opening:.2f}", 'closing_balance': f"{balance:.2f}",
+                        'total_credits': f"{total_credits:.2f}", 'total_debits': f"{total_debits:.2f}"},
+            'transactions': rows,
+        }
+        with open(os.path.join(corpus_folder, f"{stem}.expected.json"), 'w', encoding='utf-8') as expected_file:
+            json.dump(expected, expected_file, indent=1)
+
+# Main execution function
+def main():
+    corpus_folder = input("Enter the corpus folder of statements: ")
+    synthetic = input("Number of synthetic statements to generate first (blank for none): ").strip()
+    if synthetic:
+        write_synthetic_corpus(corpus_folder, int(synthetic))
+    versions = input("Parser versions to compare (comma separated, blank for all): ").strip()
+    versions = [v.strip() for v in versions.split(',')] if versions else PARSER_VERSIONS
+
+    corpus = load_corpus(corpus_folder)
+    if not corpus:
+        print("No statements found in the corpus folder.")
+        return
+    report = compare_parsers(corpus, versions)
+
+    print(f"\n{'Version':<12} {'Row accuracy':>12} {'Summaries':>10} {'Errors':>7} {'Statements/s':>13} {'Rows/s':>9}")
+    for version, result in report.items():
+        accuracy = result['matched'] / result['expected'] if result['expected'] else 1.0
+        statements_rate = result['statements'] / result['seconds'] if result['seconds'] else 0
+        rows_rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+        print(f"{version:<12} {accuracy:>11.1%} {result['summaries']:>6}/{len(corpus):<3} {result['errors']:>7} "
+              f"{statements_rate:>13.0f} {rows_rate:>9.0f}")
+    for version, result in report.items():
+        for name, difference in result['differences'][:5]:
+            print(f"{version} {name}: {difference}")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
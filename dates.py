@@ -0,0 +1,45 @@
+"""
+Fast, memoized parsers for the fixed date formats used in statements and statement filenames.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+# English month abbreviations as they appear in filenames such as "01 Jun 2022 - 30 Jun 2022.pdf"
+MONTH_NUMBERS = {name: number for number, name in enumerate(
+    ['', 'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']) if name}
+
+# Function to parse a DD/MM/YYYY transaction date; statements repeat a few dozen dates, so results are cached
+@lru_cache(maxsize=4096)
+def parse_statement_date(text):
+    digits = text[:2] + text[3:5] + text[6:]
+    if len(text) != 10 or text[2] != '/' or text[5] != '/' or not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"time data {text!r} does not match format '%d/%m/%Y'")
+    return datetime(int(text[6:]), int(text[3:5]), int(text[:2]))
+
+# Function to parse a "DD Mon YYYY" period date from a statement filename
+@lru_cache(maxsize=1024)
+def parse_period_date(text):
+    parts = text.split()
+    if len(parts) != 3 or not all(part.isascii() and part.isdigit() for part in (parts[0], parts[2])) \
+            or parts[1].lower() not in MONTH_NUMBERS:
+        raise ValueError(f"time data {text!r} does not match format '%d %b %Y'")
+    return datetime(int(parts[2]), MONTH_NUMBERS[parts[1].lower()], int(parts[0]))
+
+# Microbenchmark against strptime over a statement-like mix of repeated dates
+if __name__ == "__main__":
+    import timeit
+    import random
+    dates = [f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2022" for _ in range(60)]
+    rows = [random.choice(dates) for _ in range(10000)]
+    assert all(parse_statement_date(d) == datetime.strptime(d, '%d/%m/%Y') for d in rows)
+    assert parse_period_date('01 Jun 2022') == datetime.strptime('01 Jun 2022', '%d %b %Y')
+    parse_statement_date.cache_clear()
+
+    strptime_seconds = min(timeit.repeat(lambda: [datetime.strptime(d, '%d/%m/%Y') for d in rows], number=5, repeat=3))
+    cached_seconds = min(timeit.repeat(lambda: [parse_statement_date(d) for d in rows], number=5, repeat=3))
+    uncached_seconds = min(timeit.repeat(lambda: [parse_statement_date.__wrapped__(d) for d in rows], number=5, repeat=3))
+    print(f"strptime:            {strptime_seconds * 1e6 / (5 * len(rows)):.2f} us/date")
+    print(f"hand-rolled:         {uncached_seconds * 1e6 / (5 * len(rows)):.2f} us/date "
+          f"({strptime_seconds / uncached_seconds:.1f}x)")
+    print(f"hand-rolled, cached: {cached_seconds * 1e6 / (5 * len(rows)):.2f} us/date "
+          f"({strptime_seconds / cached_seconds:.1f}x)")
@@ -0,0 +1,114 @@
+"""
+Streaming export of cleaned transactions to CSV or JSON Lines, with optional gzip or zstd compression.
+"""
+import io
+import os
+import csv
+import gzip
+import json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Export formats mapped to their file extension; NDJSON is the same format as JSON Lines
+EXPORT_FORMATS = {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'ndjson'}
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Columns of every exported row: statement metadata first, then the transaction
+EXPORT_COLUMNS = ['statement', 'statement_period', 'date', 'description', 'debit', 'credit']
+
+# Rows buffered before a chunk is written and flushed through to the file
+CHUNK_ROWS = 1000
+
+# Function to build an export file name such as transactions.jsonl.gz
+def export_path(stem, export_format='csv', compression=None):
+    return f"{stem}.{EXPORT_FORMATS[export_format]}{COMPRESSIONS[compression]}"
+
+# Function to open a text stream over a plain, gzip or zstd compressed file
+# Appending to a compressed file adds a new gzip member or zstd frame, which readers concatenate
+def open_export(path, compression=None, append=False):
+    mode = 'a' if append else 'w'
+    if compression is None:
+        return open(path, mode, newline='', encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(path, f"{mode}t", newline='', encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+        raw = open(path, f"{mode}b")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), newline='', encoding='utf-8')
+    raise ValueError(f"Unknown compression '{compression}', expected one of: gzip, zstd")
+
+# Function to cut an export back to its first `offset` uncompressed bytes, e.g. to the last
+# checkpoint of an interrupted run; compressed exports are rewritten up to that point
+def rewind_export(path, compression=None, offset=0):
+    if compression is None:
+        with open(path, 'r+b') as export_file:
+            export_file.truncate(offset)
+        return
+    if compression == 'gzip':
+        reader, writer = gzip.open(path, 'rb'), gzip.open(f"{path}.tmp", 'wb')
+    else:
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        writer = zstandard.ZstdCompressor().stream_writer(open(f"{path}.tmp", 'wb'))
+    with reader, writer:
+        remaining = offset
+        while remaining and (data := reader.read(min(remaining, 1 << 20))):
+            writer.write(data)
+            remaining -= len(data)
+    os.replace(f"{path}.tmp", path)
+
+# Class streaming transaction rows to an export file in flushed chunks, so nothing is held per archive
+# `offset` counts the uncompressed bytes flushed so far; with append=True writing continues after an
+# existing export (rewound to `offset` with rewind_export) instead of starting a new one
+class TransactionExporter:
+    def __init__(self, path, export_format='csv', compression=None, chunk_rows=CHUNK_ROWS, append=False, offset=0):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+        self.path = path
+        self.export_format = export_format
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.offset = offset if append else 0
+        self.stream = open_export(path, compression, append)
+        self.chunk = io.StringIO()
+        self.chunk_size = 0
+        self.writer = csv.writer(self.chunk) if export_format == 'csv' else None
+        if self.writer and not append:
+            self.writer.writerow(EXPORT_COLUMNS)
+
+    # Function to add one statement's transactions with its name and period
+    def write_statement(self, name, summary, transactions):
+        period = (summary or {}).get('statement_period', '')
+        for date, description, debit, credit in transactions:
+            row = [name, period, date, description, f"{debit:.2f}", f"{credit:.2f}"]
+            if self.writer:
+                self.writer.writerow(row)
+            else:
+                self.chunk.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n")
+            self.rows += 1
+            self.chunk_size += 1
+            if self.chunk_size >= self.chunk_rows:
+                self.flush()
+
+    # Function to write the buffered chunk and flush it through any compressor
+    def flush(self):
+        text = self.chunk.getvalue()
+        self.stream.write(text)
+        self.stream.flush()
+        self.offset += len(text.encode('utf-8'))
+        self.chunk.seek(0)
+        self.chunk.truncate()
+        self.chunk_size = 0
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,219 @@
+"""
+Pluggable PDF text extractors that produce the line-oriented text the bankstats parsers expect.
+"""
+import os
+import re
+import itertools
+from dates import parse_statement_date
+import pdfplumber
+from ocr import fill_scanned_pages
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Matches the date that starts each transaction line
+TRANSACTION_DATE_PATTERN = re.compile(r'^(\d{2}/\d{2}/\d{4})\s', re.MULTILINE)
+
+# Backend used when none is requested; compare_extractors.py reports parity and speed to choose it
+# The column parser always reads word coordinates through pdfplumber, whatever is chosen here
+DEFAULT_EXTRACTOR = os.environ.get('BANKSTAT_EXTRACTOR', 'pdfplumber')
+
+# Function to find a page's earliest and latest transaction dates, and whether its dates run
+# oldest-first (True), newest-first (False) or cannot tell (None)
+def text_date_span(text):
+    dates = [parse_statement_date(date) for date in TRANSACTION_DATE_PATTERN.findall(text)]
+    if not dates:
+        return None, None, None
+    return min(dates), max(dates), None if dates[0] == dates[-1] else dates[0] < dates[-1]
+
+# Function to decide what to do with a page given its date span: 'keep', 'skip' or 'stop'
+# The first page is always kept because it carries the account summary; a page stops the selection
+# only once the statement's order is known (chronological True for oldest-first, False for newest-first)
+def page_action(page_number, first_date, last_date, start_date, end_date, chronological):
+    if page_number == 0 or first_date is None:
+        return 'keep'
+    if chronological is True and end_date is not None and first_date > end_date:
+        return 'stop'
+    if chronological is False and start_date is not None and last_date < start_date:
+        return 'stop'
+    if (start_date is not None and last_date < start_date) or (end_date is not None and first_date > end_date):
+        return 'skip'
+    return 'keep'
+
+# Function to yield the action for each page from its text_date_span, in page order
+# Unless chronological is given, the statement's order is learnt from the first page whose dates
+# show it, or from two successive pages; until then no page stops the selection
+def page_actions(spans, start_date=None, end_date=None, chronological=None):
+    previous = None
+    for page_number, (first_date, last_date, page_order) in enumerate(spans):
+        if chronological is None and first_date is not None:
+            if page_order is not None:
+                chronological = page_order
+            elif previous and first_date > previous[1]:
+                chronological = True
+            elif previous and last_date < previous[0]:
+                chronological = False
+            previous = (first_date, last_date)
+        yield page_action(page_number, first_date, last_date, start_date, end_date, chronological)
+
+# Function to read one page's text from PDFium's native text layer
+def pdfium_page_text(pdf, page_number):
+    page = pdf[page_number]
+    textpage = page.get_textpage()
+    text = normalize_lines(textpage.get_text_range())
+    textpage.close()
+    page.close()
+    return text
+
+# Function to read every page's date span from PDFium's text layer, which takes a few milliseconds a
+# page where pdfminer's character parse takes tens; None when pypdfium2 is not installed or cannot
+# load the file, leaving pdfplumber to probe (or report) it
+def probe_page_spans(source):
+    if pypdfium2 is None:
+        return None
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    try:
+        pdf = pypdfium2.PdfDocument(source)
+    except pypdfium2.PdfiumError:
+        spans = None
+    else:
+        try:
+            spans = [text_date_span(pdfium_page_text(pdf, page_number)) for page_number in range(len(pdf))]
+        finally:
+            pdf.close()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return spans
+
+# Function to normalize extracted text to one transaction per line with no trailing whitespace
+def normalize_lines(text):
+    return "\n".join(line.rstrip() for line in text.splitlines())
+
+# Function to group a page's words (already in reading order) into lines in one pass
+def group_lines(words, tolerance=3):
+    lines = []
+    for word in words:
+        if lines and abs(word['top'] - lines[-1][0]['top']) <= tolerance:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return lines
+
+# Function to lay out one page's text and release the page's layout caches
+def page_text(page):
+    text = page.extract_text() or ''
+    page.close()
+    return text
+
+# Class extracting text with pdfplumber's pure-Python layout analysis
+class PdfplumberExtractor:
+    name = 'pdfplumber'
+
+    # Pages wholly outside the date range are not laid out; their dates come from PDFium's text layer
+    # (probed before pdfplumber opens the source) or, without pypdfium2, from extract_text_simple()
+    def select_pages(self, pages, start_date=None, end_date=None, chronological=None, spans=None):
+        if start_date is None and end_date is None:
+            yield from pages
+            return
+        if spans is None:
+            spans = (text_date_span(page.extract_text_simple()) for page in pages)
+        for page, action in zip(pages, page_actions(spans, start_date, end_date, chronological)):
+            if action == 'stop':
+                return
+            if action == 'skip':
+                page.close()
+                continue
+            yield page
+
+    def extract(self, source, start_date=None, end_date=None, chronological=None, ocr=True):
+        spans = probe_page_spans(source) if start_date is not None or end_date is not None else None
+        with pdfplumber.open(source) as pdf:
+            return self.pdf_text(pdf, start_date, end_date, chronological, ocr, spans)
+
+    # Text of the selected pages of a statement that is already open
+    def pdf_text(self, pdf, start_date=None, end_date=None, chronological=None, ocr=True, spans=None):
+        pages = list(self.select_pages(pdf.pages, start_date, end_date, chronological, spans))
+        texts = [page_text(page) for page in pages]
+        if ocr:
+            texts = fill_scanned_pages(pages, texts)
+        return "\n".join(texts)
+
+    # Page texts one at a time, so a caller can stop without laying out the remaining pages
+    def iter_page_texts(self, source, ocr=True):
+        with pdfplumber.open(source) as pdf:
+            for page in pdf.pages:
+                text = page_text(page)
+                if ocr:
+                    text = fill_scanned_pages([page], [text])[0]
+                yield text
+
+    # Words with their coordinates, grouped into lines, for each selected page
+    def extract_lines(self, source, start_date=None, end_date=None, chronological=None):
+        spans = probe_page_spans(source) if start_date is not None or end_date is not None else None
+        with pdfplumber.open(source) as pdf:
+            return self.pdf_lines(pdf, start_date, end_date, chronological, spans)
+
+    def pdf_lines(self, pdf, start_date=None, end_date=None, chronological=None, spans=None):
+        pages_lines = []
+        for page in self.select_pages(pdf.pages, start_date, end_date, chronological, spans):
+            pages_lines.append(group_lines(page.extract_words()))
+            page.close()
+        return pages_lines
+
+# Class extracting text with PDFium's native text layer through pypdfium2
+class PdfiumExtractor:
+    name = 'pypdfium2'
+
+    def extract(self, source, start_date=None, end_date=None, chronological=None, ocr=True):
+        if pypdfium2 is None:
+            raise RuntimeError("pypdfium2 is not installed")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        pdf = pypdfium2.PdfDocument(source)
+        texts, page_numbers = [], []
+        try:
+            # Each page is read once; tee hands its text to both the date check and the output
+            page_texts, probed = itertools.tee(pdfium_page_text(pdf, page_number) for page_number in range(len(pdf)))
+            actions = page_actions(map(text_date_span, probed), start_date, end_date, chronological)
+            for page_number, (action, text) in enumerate(zip(actions, page_texts)):
+                if action == 'stop':
+                    break
+                if action == 'keep':
+                    texts.append(text)
+                    page_numbers.append(page_number)
+        finally:
+            pdf.close()
+
+        # Scanned pages go through pdfplumber's renderer for the OCR fallback
+        if ocr and any(not text.strip() for text in texts):
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            with pdfplumber.open(source) as plumber_pdf:
+                texts = fill_scanned_pages([plumber_pdf.pages[n] for n in page_numbers], texts)
+        return "\n".join(texts)
+
+    # Page texts one at a time; scanned pages come back empty, since OCR renders through pdfplumber
+    # and that cannot share a stream PDFium is still reading
+    def iter_page_texts(self, source, ocr=True):
+        if pypdfium2 is None:
+            raise RuntimeError("pypdfium2 is not installed")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            for page_number in range(len(pdf)):
+                yield pdfium_page_text(pdf, page_number)
+        finally:
+            pdf.close()
+
+EXTRACTORS = {extractor.name: extractor for extractor in (PdfplumberExtractor(), PdfiumExtractor())}
+
+# Function to look up an extractor backend by name
+def get_extractor(name=None):
+    try:
+        return EXTRACTORS[name or DEFAULT_EXTRACTOR]
+    except KeyError:
+        raise ValueError(f"Unknown PDF extractor '{name}', expected one of: {', '.join(EXTRACTORS)}")
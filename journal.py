@@ -0,0 +1,105 @@
+"""
+Run journal for resumable batch runs: completed statements with their export offsets, and
+failed statements quarantined with their traceback.
+"""
+import os
+import json
+import hashlib
+import traceback
+
+JOURNAL_NAME = 'run.journal.jsonl'
+QUARANTINE_FOLDER = 'quarantine'
+
+# Function to format an error's traceback, preferring the one captured in the worker process
+def format_error(error):
+    remote = getattr(error, 'remote_traceback', None)
+    local = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+    return f"{remote}\nRaised in the pipeline:\n{local}" if remote else local
+
+# Class appending one JSON record per event to the journal, each synced to disk before the run moves on
+# Records: {"event": "export", ...} starts an export; "done" records a statement's export offsets;
+# "failed" records a quarantined statement
+class RunJournal:
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, JOURNAL_NAME)
+        self.quarantine_folder = os.path.join(output_folder, QUARANTINE_FOLDER)
+        self.export = None
+        self.offset = 0
+        self.completed = {}
+        self.failed = {}
+        self.load()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    # Function to replay the journal; a line torn by a crash is cut off so later records stay readable
+    def load(self):
+        try:
+            journal_file = open(self.path, 'r+b')
+        except FileNotFoundError:
+            return
+        with journal_file:
+            good_end = 0
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_end += len(line)
+                self.replay(record)
+            journal_file.truncate(good_end)
+
+    def replay(self, record):
+        event = record['event']
+        if event == 'export':
+            self.export, self.offset = record, record['offset']
+            self.completed, self.failed = {}, {}
+        elif event == 'done':
+            self.completed[record['name']] = record
+            self.failed.pop(record['name'], None)
+            self.offset = record['end']
+        elif event == 'failed':
+            self.failed[record['name']] = record
+
+    def append(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.replay(record)
+
+    # Function to tell whether a statement was finished or quarantined by an earlier run
+    def finished(self, name, retry_failed=False):
+        return name in self.completed or (not retry_failed and name in self.failed)
+
+    # Function to check that the journal's export matches the one about to be written
+    def resumable(self, path, export_format, compression):
+        return (self.export is not None and os.path.exists(path) and self.export['path'] == path
+                and self.export['format'] == export_format and self.export['compression'] == compression)
+
+    def start_export(self, path, export_format, compression, offset):
+        self.append({'event': 'export', 'path': path, 'format': export_format,
+                     'compression': compression, 'offset': offset})
+
+    def record_done(self, name, start, end, transactions):
+        self.append({'event': 'done', 'name': name, 'start': start, 'end': end, 'transactions': transactions})
+
+    # Function to save a failed statement's bytes and traceback under quarantine/ and journal it
+    def quarantine(self, name, data, error):
+        os.makedirs(self.quarantine_folder, exist_ok=True)
+        stem = f"{hashlib.sha1(name.encode()).hexdigest()[:8]}-{os.path.basename(name)}"
+        saved = None
+        if isinstance(data, bytes):
+            saved = os.path.join(self.quarantine_folder, stem)
+            with open(saved, 'wb') as quarantine_file:
+                quarantine_file.write(data)
+        details = format_error(error)
+        with open(os.path.join(self.quarantine_folder, f"{stem}.traceback.txt"), 'w', encoding='utf-8') as traceback_file:
+            traceback_file.write(f"{name}\n\n{details}")
+        self.append({'event': 'failed', 'name': name, 'error': repr(error), 'quarantined': saved})
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
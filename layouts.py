@@ -0,0 +1,119 @@
+"""
+Statement-format detection from first-page structural fingerprints, backed by a local cache of known layouts.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import pdfplumber
+
+# Where known layouts are stored, keyed by fingerprint
+LAYOUT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'bankstat', 'layouts.json')
+
+# Header words recognised as table columns, mapped to their column name
+COLUMN_HEADERS = {
+    'date': 'date', 'description': 'description', 'details': 'description', 'transaction': 'description',
+    'fees': 'fees', 'fee': 'fees', 'debit': 'debit', 'debits': 'debit', 'credit': 'credit',
+    'credits': 'credit', 'balance': 'balance', 'amount': 'amount',
+}
+
+# Header positions are bucketed so small rendering differences map to the same fingerprint
+POSITION_BUCKET = 10
+
+# Layout used when a statement's header cannot be recognised; matches the bankstats13 regexes
+DEFAULT_LAYOUT = {
+    'name': 'default',
+    'transaction_pattern': r'(\d{2}/\d{2}/\d{4})\s+(.*?)\s+([-\d,.]+)(?:\s+([-\d,.]+))?$',
+    'columns': [],
+}
+
+# Function to find the table header line on a page as a list of (column, x0, x1) in page order
+def find_header_columns(words):
+    lines = {}
+    for word in words:
+        column = COLUMN_HEADERS.get(word['text'].strip(':').lower())
+        if column:
+            lines.setdefault(round(word['top']), []).append((column, word['x0'], word['x1']))
+    if not lines:
+        return [], None
+    top, header = max(lines.items(), key=lambda item: (len(item[1]), -item[0]))
+    if len(header) < 3:
+        return [], None
+    return sorted(header, key=lambda column: column[1]), top
+
+# Function to turn header positions into column boundaries halfway between header centres
+def column_bounds(header, page_width):
+    centres = [(x0 + x1) / 2 for _, x0, x1 in header]
+    bounds = []
+    for i, (column, _, _) in enumerate(header):
+        left = 0 if i == 0 else (centres[i - 1] + centres[i]) / 2
+        right = page_width if i == len(header) - 1 else (centres[i] + centres[i + 1]) / 2
+        bounds.append([column, round(left, 1), round(right, 1)])
+    return bounds
+
+# Function to hash a first page's structural features: page width and table column positions
+# Text above the table is left out: it is mostly the customer's name and address, which would give
+# every customer their own entry for the same layout
+def layout_fingerprint(page):
+    header, _ = find_header_columns(page.extract_words())
+    features = {
+        'width': round(page.width / POSITION_BUCKET),
+        'columns': [[column, round((x0 + x1) / 2 / POSITION_BUCKET)] for column, x0, x1 in header],
+    }
+    fingerprint = hashlib.sha1(json.dumps(features, sort_keys=True).encode()).hexdigest()
+    return fingerprint, header
+
+def load_layouts(cache_path=LAYOUT_CACHE):
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+# Workers save concurrently, so each writes its own temporary file; the last replace wins, and a
+# layout it drops is simply learned again on its next statement
+def save_layouts(layouts, cache_path=LAYOUT_CACHE):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+    try:
+        with open(handle, 'w', encoding='utf-8') as cache_file:
+            json.dump(layouts, cache_file, indent=2, sort_keys=True)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+# Function to detect a statement's layout from its first page, learning unseen layouts into the cache
+def detect_layout(source, cache_path=LAYOUT_CACHE):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with pdfplumber.open(source) as pdf:
+        layout = detect_page_layout(pdf.pages[0], cache_path)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return layout
+
+# Function to detect the layout of a statement that is already open, from its first page
+# The page is left open, so a caller reading the same page next reuses its parsed characters
+def detect_page_layout(page, cache_path=LAYOUT_CACHE):
+    fingerprint, header = layout_fingerprint(page)
+    layouts = load_layouts(cache_path)
+    if fingerprint in layouts:
+        return dict(layouts[fingerprint], fingerprint=fingerprint)
+    if not header:
+        print("Warning: Statement table header not recognised; using the default layout.")
+        return dict(DEFAULT_LAYOUT, fingerprint=fingerprint)
+
+    layout = dict(DEFAULT_LAYOUT, name=f"auto-{fingerprint[:8]}", columns=column_bounds(header, page.width))
+    layouts[fingerprint] = layout
+    # The cache only saves work, so a failed write must not fail the statement
+    try:
+        save_layouts(layouts, cache_path)
+    except OSError as error:
+        print(f"Warning: Could not save the layout cache: {error}")
+    print(f"New statement layout {layout['name']} with columns: {', '.join(c[0] for c in layout['columns'])}")
+    return dict(layout, fingerprint=fingerprint)
+
+# Function to tell whether a layout has amount columns the coordinate-based parser can use
+def has_amount_columns(layout):
+    return any(column[0] in ('debit', 'credit', 'amount') for column in layout['columns'])
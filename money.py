@@ -0,0 +1,119 @@
+"""
+Fixed-point money type backed by integer cents, for exact totals at integer speed.
+"""
+from decimal import Decimal
+
+# Class holding an amount as a whole number of cents
+class Money:
+    __slots__ = ('cents',)
+
+    def __init__(self, cents=0):
+        self.cents = int(cents)
+
+    # Function to parse statement amounts such as "1,234.56", "1,234.56*", "-12.5", "12.00-" or "R99"
+    @classmethod
+    def parse(cls, text):
+        value = text.replace(',', '').replace(' ', '').rstrip('*')
+        negative = False
+        if value.endswith('-'):
+            negative, value = True, value[:-1]
+        if value.startswith('-'):
+            negative, value = True, value[1:]
+        if value.startswith('R'):
+            value = value[1:]
+        whole, _, fraction = value.partition('.')
+        digits = whole + fraction
+        if len(fraction) > 2 or not (digits.isascii() and digits.isdecimal()):
+            raise ValueError(f"Invalid amount: {text!r}")
+        cents = int(whole or '0') * 100 + int(fraction.ljust(2, '0'))
+        return cls(-cents if negative else cents)
+
+    @classmethod
+    def from_decimal(cls, value):
+        return cls(int((Decimal(value) * 100).to_integral_value()))
+
+    # Function to total many amounts with a single integer sum
+    @staticmethod
+    def total(amounts):
+        return Money(sum(amount.cents for amount in amounts))
+
+    def to_decimal(self):
+        return Decimal(self.cents).scaleb(-2)
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __str__(self):
+        return f"R{self:.2f}"
+
+    def __repr__(self):
+        return f"Money('{self:.2f}')"
+
+    # Format specs apply to the decimal value, so f"R{amount:.2f}" gives "R1234.56"
+    def __format__(self, spec):
+        if not spec:
+            return str(self)
+        return format(self.to_decimal(), spec)
+
+    def __reduce__(self):
+        return (Money, (self.cents,))
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        return NotImplemented
+
+    # Lets sum() start from 0
+    def __radd__(self, other):
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, Money):
+            return self.cents <= other.cents
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, Money):
+            return self.cents > other.cents
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Money):
+            return self.cents >= other.cents
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.cents)
+
+ZERO = Money(0)
+
+# Function to turn amounts into a NumPy int64 array of cents for vectorized sums
+def cents_array(amounts):
+    import numpy as np
+    return np.fromiter((amount.cents for amount in amounts), dtype=np.int64)
@@ -3,6 +3,7 @@ from tabula import convert_into
 import os
 import re
 from datetime import datetime
+from money import Money, ZERO
 
 def get_pdf_files(folder_path):
     pdf_files = [f for f in os.listdir(folder_path) if f.endswith('.pdf')]
@@ -57,7 +58,7 @@ def main():
         print("PDF conversion and analysis skipped.")
 
 def finance_manager(file):
-    sum = 0
+    sum = ZERO
     transactions = []
     with open(file, mode='r') as csv_file:
         csv_reader = csv.reader(csv_file)
@@ -65,7 +66,7 @@ def finance_manager(file):
         for row in csv_reader:
             #get name, amount, currency
             name = row[4]
-            amount = float(row[7])
+            amount = Money.parse(row[7])
             date = row[1]
 
             transaction = (date, name, amount)
@@ -0,0 +1,96 @@
+"""
+Optional OCR fallback for scanned statement pages, with results cached by page-image hash.
+"""
+import io
+import os
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# Where OCR text is cached, one file per page-image hash
+OCR_CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'bankstat', 'ocr')
+OCR_RESOLUTION = 300
+OCR_LANGUAGE = 'eng'
+
+_executor = None
+
+# Function to hash the images embedded in a page, or None when the page has none
+def page_image_key(page):
+    digest = hashlib.sha256(f"{OCR_RESOLUTION}:{OCR_LANGUAGE}:".encode())
+    images = page.images
+    if not images:
+        return None
+    for image in images:
+        digest.update(image['stream'].get_rawdata() or b'')
+    return digest.hexdigest()
+
+# Function to render a page to PNG bytes for Tesseract
+def render_page(page):
+    buffer = io.BytesIO()
+    page.to_image(resolution=OCR_RESOLUTION).original.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+# Function to OCR one rendered page (runs in a worker process)
+def ocr_image(png):
+    from PIL import Image
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png)), lang=OCR_LANGUAGE)
+
+def read_cached_text(key, cache_folder=OCR_CACHE_FOLDER):
+    try:
+        with open(os.path.join(cache_folder, f"{key}.txt"), encoding='utf-8') as cached:
+            return cached.read()
+    except OSError:
+        return None
+
+# Two workers may OCR the same scan at once, so each writes its own temporary file
+def write_cached_text(key, text, cache_folder=OCR_CACHE_FOLDER):
+    os.makedirs(cache_folder, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=cache_folder, prefix=f"{key}.", suffix='.tmp')
+    try:
+        with open(handle, 'w', encoding='utf-8') as cached:
+            cached.write(text)
+        os.replace(temp_path, os.path.join(cache_folder, f"{key}.txt"))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+# Function to OCR rendered pages, in a process pool unless already inside a daemonic worker
+def ocr_images(images):
+    global _executor
+    if multiprocessing.current_process().daemon:
+        return [ocr_image(png) for png in images]
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+    return list(_executor.map(ocr_image, images))
+
+# Function to fill in the text of pages that have no text layer, reusing cached OCR results
+def fill_scanned_pages(pages, texts, cache_folder=OCR_CACHE_FOLDER):
+    scanned = [i for i, text in enumerate(texts) if not text.strip()]
+    if not scanned:
+        return texts
+    if pytesseract is None:
+        print(f"Warning: {len(scanned)} page(s) have no text layer; install pytesseract and Tesseract to OCR them.")
+        return texts
+
+    texts = list(texts)
+    to_ocr = []
+    for i in scanned:
+        key = page_image_key(pages[i])
+        if key is None:
+            continue
+        cached = read_cached_text(key, cache_folder)
+        if cached is None:
+            to_ocr.append((i, key, render_page(pages[i])))
+        else:
+            texts[i] = cached
+    if to_ocr:
+        for (i, key, _), text in zip(to_ocr, ocr_images([png for _, _, png in to_ocr])):
+            write_cached_text(key, text, cache_folder)
+            texts[i] = text
+    return texts
@@ -0,0 +1,94 @@
+"""
+Payee canonicalization: strips volatile tokens from transaction descriptions, interns the canonical
+names as small integer ids and keeps raw-to-id mappings in a bounded LRU cache persisted across runs.
+"""
+import os
+import re
+import sys
+import json
+from collections import OrderedDict
+
+# Where the payee names and the LRU of raw descriptions are persisted
+PAYEE_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'bankstat', 'payees.json')
+PAYEE_CACHE_SIZE = 50000
+
+# Rules applied in order to an upper-cased description; each removes tokens that vary between
+# transactions with the same merchant
+PAYEE_RULES = [
+    (re.compile(r'\b(?:CARD|CRD)\s*(?:NO\.?\s*)?[\dX*#]+'), ' '),        # card numbers and masked suffixes
+    (re.compile(r'\bREF(?:ERENCE)?\b\.?\s*(?:NO\b\.?\s*)?[:#]?\s*(?=\S*\d)\S+'), ' '),  # reference numbers
+    (re.compile(r'\b\d{1,2}[/.-]\d{1,2}(?:[/.-]\d{2,4})?\b'), ' '),      # embedded dates
+    (re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?\b'), ' '),                  # times
+    (re.compile(r'\b(?=[A-Z]*\d)[A-Z\d]{6,}\b'), ' '),                   # long alphanumeric codes
+    (re.compile(r'[\d*#/.:,()-]+'), ' '),                                # remaining digits and punctuation
+]
+
+# Function to reduce a raw description to its canonical payee name
+def canonical_payee(description):
+    text = description.upper()
+    for pattern, replacement in PAYEE_RULES:
+        text = pattern.sub(replacement, text)
+    return ' '.join(text.split()) or 'UNKNOWN'
+
+# Class interning canonical payee names as integer ids, with an LRU of raw description -> id
+class PayeeRegistry:
+    def __init__(self, cache_path=PAYEE_CACHE, maxsize=PAYEE_CACHE_SIZE):
+        self.cache_path = cache_path
+        self.maxsize = maxsize
+        self.names = []
+        self.ids = {}
+        self.mappings = OrderedDict()
+        self.changed = False
+        self.load()
+
+    # Function to return the id of a raw description's payee, canonicalizing it only on a cache miss
+    def payee_id(self, description):
+        payee = self.mappings.get(description)
+        if payee is not None:
+            self.mappings.move_to_end(description)
+            return payee
+        name = canonical_payee(description)
+        payee = self.ids.get(name)
+        if payee is None:
+            payee = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.ids[name] = payee
+        self.mappings[description] = payee
+        if len(self.mappings) > self.maxsize:
+            self.mappings.popitem(last=False)
+        self.changed = True
+        return payee
+
+    def name(self, payee):
+        return self.names[payee]
+
+    # Names are kept in id order, so ids stay the same across runs
+    def load(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        self.names = [sys.intern(name) for name in data.get('names', [])]
+        self.ids = {name: payee for payee, name in enumerate(self.names)}
+        self.mappings = OrderedDict((raw, payee) for raw, payee in data.get('mappings', [])[-self.maxsize:]
+                                    if payee < len(self.names))
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(f"{self.cache_path}.tmp", 'w', encoding='utf-8') as cache_file:
+            json.dump({'names': self.names, 'mappings': list(self.mappings.items())}, cache_file)
+        os.replace(f"{self.cache_path}.tmp", self.cache_path)
+        self.changed = False
+
+_registry = None
+
+# Function to get the shared registry, loading the persisted cache on first use
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = PayeeRegistry()
+    return _registry
@@ -0,0 +1,66 @@
+"""
+Memory-mapped access to a statement PDF, so the readers of one file share a single mapping.
+"""
+import io
+import os
+import mmap
+
+# Read-only, seekable stream over a shared buffer (each consumer gets its own position)
+class BufferReader(io.RawIOBase):
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        chunk = self._buffer[self._position:self._position + len(target)]
+        target[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+# Class that memory-maps a PDF once and hands the same pages to each PDF reader
+class MappedPDF:
+    def __init__(self, pdf_path):
+        self.path = pdf_path
+        self._file = open(pdf_path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffer = memoryview(self._map)
+        else:
+            self._map = None
+            self.buffer = memoryview(b'')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    # Fresh file-like view for pdfplumber and other stream consumers
+    def stream(self):
+        return io.BufferedReader(BufferReader(self.buffer))
+
+    def close(self):
+        self.buffer.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,179 @@
+"""
+Staged pipeline that overlaps reading, extraction, parsing and writing of bank statements.
+"""
+import os
+import io
+import queue
+import threading
+from datetime import datetime
+from bankstats13 import parse_pdf_name, period_overlaps, parse_statement
+from archives import iter_statement_sources, split_source_name
+from workers import WorkerPool
+from exporters import EXPORT_FORMATS, TransactionExporter, export_path, rewind_export
+from journal import JOURNAL_NAME, RunJournal
+
+# Marks the end of the stream on a stage queue
+_DONE = object()
+
+# Extraction workers are replaced after this many files or this much resident memory
+RECYCLE_AFTER_FILES = 200
+RECYCLE_AFTER_MB = 1024
+
+# A file whose extraction runs longer than this has its worker killed and is reported as failed;
+# each worker's address space is capped at FILE_MEMORY_LIMIT_MB
+FILE_TIMEOUT = 120
+FILE_MEMORY_LIMIT_MB = 4096
+
+# Function to parse a statement's bytes inside a worker process, limited to the period in its name
+def parse_pdf_bytes(pdf_path, data):
+    start_date, end_date = parse_pdf_name(os.path.basename(split_source_name(pdf_path)[1]))
+    return parse_statement(io.BytesIO(data), start_date, end_date)
+
+# Stage 1: read the raw bytes of each statement (sources yield (name, bytes or error)),
+# passing over statements a resumed run's journal has already finished; stops early if a later stage failed
+def read_stage(sources, out_queue, journal, retry_failed, stop):
+    skipped = 0
+    for name, data in sources:
+        if stop.is_set():
+            break
+        if journal.finished(name, retry_failed):
+            skipped += 1
+            continue
+        out_queue.put((name, data))
+    if skipped:
+        print(f"Skipped {skipped} statements finished by an earlier run")
+
+# Stage 2: hand the bytes to the process pool for extraction and parsing
+def extract_stage(in_queue, out_queue, executor):
+    while (item := in_queue.get()) is not _DONE:
+        pdf_path, data = item
+        if isinstance(data, Exception):
+            out_queue.put((pdf_path, data, data))
+        else:
+            out_queue.put((pdf_path, executor.submit(parse_pdf_bytes, pdf_path, data), data))
+
+# Stage 3: wait for each statement's summary and transactions, in the order the statements were read
+# A failed statement keeps its bytes so the writer can quarantine it
+def parse_stage(in_queue, out_queue):
+    while (item := in_queue.get()) is not _DONE:
+        pdf_path, pending, data = item
+        try:
+            if isinstance(pending, Exception):
+                raise pending
+            summary, transactions = pending.result()
+            out_queue.put((pdf_path, summary, transactions, None, None))
+        except Exception as error:
+            out_queue.put((pdf_path, None, None, error, data))
+
+# Stage 4: stream each statement's cleaned transactions into the run's export as it arrives
+# Only per-statement counts are kept, so exporting a whole archive never holds all its rows
+# Each statement is flushed and journaled with its export offsets; failures are quarantined
+def write_stage(in_queue, exporter, journal, results):
+    while (item := in_queue.get()) is not _DONE:
+        pdf_path, summary, transactions, error, data = item
+        if error is None:
+            start = exporter.offset
+            exporter.write_statement(pdf_path, summary, transactions)
+            exporter.flush()
+            journal.record_done(pdf_path, start, exporter.offset, len(transactions))
+            print(f"Processed {pdf_path}: {len(transactions)} transactions")
+            transactions = len(transactions)
+        else:
+            journal.quarantine(pdf_path, data, error)
+            print(f"Warning: Failed to process {pdf_path}: {error} (quarantined)")
+        results.append((pdf_path, summary, transactions, error))
+
+# Function to run one stage in its own thread and end its output queue whatever happens
+# A stage that raises records the error, tells the reader to stop and keeps draining its input,
+# so the stages on either side of it finish instead of blocking on a queue
+def run_stage(stage, args, in_queue, out_queue, errors, stop):
+    try:
+        stage(*args)
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+        if in_queue is not None:
+            while in_queue.get() is not _DONE:
+                pass
+    finally:
+        if out_queue is not None:
+            out_queue.put(_DONE)
+
+# Function to open the run's export, continuing an interrupted run's export from its journal
+def open_run_export(journal, output_path, export_format, compression, resume):
+    if resume and journal.resumable(output_path, export_format, compression):
+        rewind_export(output_path, compression, journal.offset)
+        print(f"Resuming: {len(journal.completed)} statements done, {len(journal.failed)} quarantined")
+        return TransactionExporter(output_path, export_format, compression, append=True, offset=journal.offset)
+    exporter = TransactionExporter(output_path, export_format, compression)
+    exporter.flush()
+    journal.start_export(output_path, export_format, compression, exporter.offset)
+    return exporter
+
+# Function to run all stages concurrently with bounded queues between them
+# Results are (name, summary, transaction count, error) per statement processed in this run
+def run_pipeline(sources, output_folder, workers=None, queue_size=4,
+                 max_files=RECYCLE_AFTER_FILES, max_memory_mb=RECYCLE_AFTER_MB,
+                 export_format='csv', compression=None, resume=True, retry_failed=False,
+                 timeout=FILE_TIMEOUT, memory_limit_mb=FILE_MEMORY_LIMIT_MB):
+    os.makedirs(output_folder, exist_ok=True)
+    output_path = os.path.join(output_folder, export_path('transactions', export_format, compression))
+    workers = workers or os.cpu_count()
+    read_queue = queue.Queue(maxsize=queue_size)
+    # Futures in this queue are the files in flight, so let it cover every worker
+    extract_queue = queue.Queue(maxsize=max(queue_size, workers))
+    write_queue = queue.Queue(maxsize=queue_size)
+    results = []
+
+    with RunJournal(output_folder) as journal, WorkerPool(workers, max_files, max_memory_mb, timeout, memory_limit_mb) as executor, \
+            open_run_export(journal, output_path, export_format, compression, resume) as exporter:
+        errors = []
+        stop = threading.Event()
+        stages = [
+            (read_stage, (sources, read_queue, journal, retry_failed, stop), None, read_queue),
+            (extract_stage, (read_queue, extract_queue, executor), read_queue, extract_queue),
+            (parse_stage, (extract_queue, write_queue), extract_queue, write_queue),
+            (write_stage, (write_queue, exporter, journal, results), write_queue, None),
+        ]
+        threads = [threading.Thread(target=run_stage, args=(*stage, errors, stop)) for stage in stages]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # A broken run fails loudly once every stage has stopped; raising here still closes the export and journal
+        if errors:
+            raise errors[0]
+    print(f"Exported {exporter.rows} transactions to {output_path}")
+    print(f"Workers recycled: {executor.recycled}, killed for timeout: {executor.killed}, "
+          f"peak worker RSS: {executor.peak_rss_mb:.0f} MB")
+    return results
+
+# Main execution function
+def main():
+    folder_path = input("Enter the folder or zip/tar archive containing bank statements: ")
+    output_folder = input("Enter the output folder for the transaction export: ") or folder_path
+    if os.path.isfile(output_folder):
+        output_folder = os.path.dirname(output_folder)
+    export_format = input(f"Export format ({'/'.join(EXPORT_FORMATS)}, default csv): ").strip().lower() or 'csv'
+    compression = input("Compression (gzip/zstd, blank for none): ").strip().lower() or None
+    date_range = input("Enter a date range to process (DD/MM/YYYY - DD/MM/YYYY), or leave blank for all: ").strip()
+
+    resume = retry_failed = False
+    if os.path.exists(os.path.join(output_folder, JOURNAL_NAME)):
+        resume = input("Resume the interrupted run in the output folder? (yes/no): ").lower() == 'yes'
+        retry_failed = resume and input("Retry quarantined statements? (yes/no): ").lower() == 'yes'
+
+    name_filter = None
+    if date_range:
+        range_start, range_end = (datetime.strptime(d.strip(), '%d/%m/%Y') for d in date_range.split('-'))
+        name_filter = lambda name: period_overlaps(*parse_pdf_name(name), range_start, range_end)
+
+    results = run_pipeline(iter_statement_sources(folder_path, name_filter), output_folder,
+                           export_format=export_format, compression=compression,
+                           resume=resume, retry_failed=retry_failed)
+    failed = sum(1 for result in results if result[3] is not None)
+    print(f"Processed {len(results) - failed} statements, {failed} failed.")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Fast re-analysis of previously converted statement CSVs with pandas' vectorized reader.
+"""
+import os
+import re
+import pandas as pd
+from money import Money
+from bankstats13 import TABLE_COLUMNS
+from exporters import EXPORT_COLUMNS
+
+# Headerless layouts read by position, as (date, description, amount) column numbers
+# bankstats.py reads columns 1, 2 and 4; monthlybankstats.py reads columns 1, 4 and 7
+POSITIONAL_LAYOUTS = {
+    'bankstats': (1, 2, 4),
+    'monthly': (1, 4, 7),
+}
+
+# The header bankstats2.py looks for, possibly after a preamble
+BANKSTATS2_HEADER = re.compile(r'Date,Description,.*Debits \(R\),Credits \(R\),Balance \(R\)')
+
+# Function to find the converted CSVs in a folder tree
+def find_csv_files(folder_path):
+    paths = []
+    folders = [folder_path]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    folders.append(entry.path)
+                elif entry.name.endswith('.csv'):
+                    paths.append(entry.path)
+    return sorted(paths)
+
+# Function to turn a column of amounts into int64 cents; blanks are 0, unparsable cells are NaN
+def to_cents(column):
+    if pd.api.types.is_numeric_dtype(column):
+        return (column.fillna(0) * 100).round().astype('Int64')
+    text = column.fillna('').str.replace(',', '', regex=False).str.strip().str.rstrip('*')
+    negative = text.str.endswith('-')
+    text = text.where(~negative, '-' + text.str[:-1])
+    amounts = pd.to_numeric(text.where(text != '', '0'), errors='coerce')
+    return (amounts * 100).round().astype('Int64')
+
+# Function to read a CSV with its amount columns parsed as numbers by the C reader, falling back to
+# text when a column holds something else ("12.00*", "5.00-", stray words) for to_cents to clean up
+def read_amounts_csv(path, text_columns, amount_columns, **options):
+    try:
+        return pd.read_csv(path, dtype={**dict.fromkeys(text_columns, str), **dict.fromkeys(amount_columns, 'float64')},
+                           thousands=',', na_values=dict.fromkeys(amount_columns, ['']), **options)
+    except ValueError:
+        return pd.read_csv(path, dtype=str, **options)
+
+# Function to work out how a CSV was written from its first lines: (layout, rows to skip)
+def detect_csv_layout(path, positional_layout='bankstats'):
+    with open(path, encoding='utf-8', errors='replace') as csv_file:
+        for line_number, line in enumerate(csv_file):
+            if line_number > 50:
+                break
+            header = line.rstrip('\r\n')
+            if BANKSTATS2_HEADER.match(header):
+                return 'bankstats2', line_number
+            if header.split(',') == EXPORT_COLUMNS:
+                return 'export', line_number
+            if header.split(',') == TABLE_COLUMNS:
+                return 'tables', line_number
+    return positional_layout, 0
+
+# Function to load one CSV as a frame of date, description, debit and credit cents
+def load_transactions(path, positional_layout='bankstats'):
+    layout, skip_rows = detect_csv_layout(path, positional_layout)
+    read_options = {'keep_default_na': False, 'skiprows': skip_rows,
+                    'on_bad_lines': 'skip', 'encoding_errors': 'replace'}
+
+    if layout in POSITIONAL_LAYOUTS:
+        date_column, description_column, amount_column = POSITIONAL_LAYOUTS[layout]
+        # The first row is tabula's header, which the legacy readers skipped
+        columns = [date_column, description_column, amount_column]
+        frame = read_amounts_csv(path, [date_column, description_column], [amount_column], header=None, usecols=columns, **dict(read_options, skiprows=1))
+        amount = to_cents(frame[amount_column])
+        frame = pd.DataFrame({'date': frame[date_column], 'description': frame[description_column],
+                              'debit': (-amount).clip(lower=0), 'credit': amount.clip(lower=0)})
+    elif layout == 'bankstats2':
+        frame = read_amounts_csv(path, ['Date', 'Description'], ['Debits (R)', 'Credits (R)'], **read_options)
+        frame = pd.DataFrame({'date': frame['Date'], 'description': frame['Description'],
+                              'debit': to_cents(frame['Debits (R)']), 'credit': to_cents(frame['Credits (R)'])})
+    else:
+        amount_columns = ['debit', 'credit', 'amount'] if layout == 'tables' else ['debit', 'credit']
+        frame = read_amounts_csv(path, ['date', 'description'], amount_columns, **read_options)
+        frame = frame[frame['date'].str.match(r'\d{2}/\d{2}/\d{4}$')]
+        debit = to_cents(frame['debit']).abs()
+        credit = to_cents(frame['credit'])
+        if 'amount' in frame:
+            amount = to_cents(frame['amount'])
+            debit, credit = debit + (-amount).clip(lower=0), credit + amount.clip(lower=0)
+        frame = pd.DataFrame({'date': frame['date'], 'description': frame['description'],
+                              'debit': debit, 'credit': credit})
+
+    # Rows with an unparsable amount are skipped, as the csv.reader loops did
+    valid = frame['debit'].notna() & frame['credit'].notna()
+    return layout, frame[valid].reset_index(drop=True), int((~valid).sum())
+
+# Function to re-summarize every converted CSV in a folder tree
+def reanalyze_folder(folder_path, positional_layout='bankstats'):
+    report = []
+    for path in find_csv_files(folder_path):
+        try:
+            layout, frame, skipped = load_transactions(path, positional_layout)
+        except (ValueError, KeyError, pd.errors.ParserError) as error:
+            print(f"Warning: Could not read {path}: {error}")
+            continue
+        debits, credits = Money(frame['debit'].sum()), Money(frame['credit'].sum())
+        report.append({'path': path, 'layout': layout, 'transactions': frame, 'skipped': skipped,
+                       'debits': debits, 'credits': credits, 'net': credits - debits})
+    return report
+
+# Main execution function
+def main():
+    folder_path = input("Enter the folder path containing converted CSV files: ")
+    positional_layout = input(f"Layout of headerless CSVs ({'/'.join(POSITIONAL_LAYOUTS)}, default bankstats): ").strip() or 'bankstats'
+    if positional_layout not in POSITIONAL_LAYOUTS:
+        print(f"Unknown layout '{positional_layout}'.")
+        return
+
+    report = reanalyze_folder(folder_path, positional_layout)
+    if not report:
+        print("No CSV files found in the specified folder.")
+        return
+
+    for result in report:
+        print(f"{os.path.relpath(result['path'], folder_path)} [{result['layout']}]: "
+              f"{len(result['transactions'])} transactions, debits {result['debits']}, "
+              f"credits {result['credits']}, sum {result['net']}")
+        if result['skipped']:
+            print(f"  Warning: {result['skipped']} rows with invalid amounts skipped")
+    total = Money.total(result['net'] for result in report)
+    count = sum(len(result['transactions']) for result in report)
+    print(f"\nRe-analyzed {len(report)} files, {count} transactions, overall sum {total}")
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
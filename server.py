@@ -0,0 +1,175 @@
+"""
+Local HTTP service that parses uploaded bank statements with a pool of pre-warmed worker processes.
+
+POST /parse    body is the PDF; optional query parameters: name (statement filename),
+               start and end (DD/MM/YYYY). Returns the summary and transactions as JSON.
+GET  /metrics  Prometheus text format counters.
+GET  /health   Liveness check.
+"""
+import io
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import wait
+from bankstats13 import parse_pdf_name, parse_statement
+from money import Money
+from workers import WorkerPool
+from pipeline import FILE_TIMEOUT, FILE_MEMORY_LIMIT_MB
+
+# Largest upload accepted, in bytes
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# Function run once in each worker so imports and module setup happen before the first request
+def warm_worker():
+    import pdfplumber
+    import pdfminer.layout
+    return pdfplumber.__version__, pdfminer.layout.LAParams.__name__
+
+# Function to parse one uploaded statement inside a worker process
+def parse_upload(data, name, start_date, end_date):
+    if start_date is None or end_date is None:
+        name_start, name_end = parse_pdf_name(name or '')
+        start_date = start_date or name_start
+        end_date = end_date or name_end
+    summary, transactions = parse_statement(io.BytesIO(data), start_date, end_date)
+    return {
+        'summary': {key: f"{value:.2f}" if isinstance(value, Money) else value for key, value in summary.items()},
+        'transactions': [
+            {'date': date, 'description': description, 'debit': f"{debit:.2f}", 'credit': f"{credit:.2f}"}
+            for date, description, debit, credit in transactions
+        ],
+    }
+
+# Class collecting request counters for the metrics endpoint
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {'requests_total': 0, 'rejected_total': 0, 'failures_total': 0,
+                         'in_flight': 0, 'parse_seconds_sum': 0.0, 'parse_seconds_count': 0}
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def render(self):
+        with self.lock:
+            return ''.join(f"bankstat_{key} {value}\n" for key, value in self.counters.items())
+
+# Class handling HTTP requests; the server object carries the pool, limits and metrics
+class StatementHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self.send_text(200, self.server.metrics.render())
+        elif path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            self.send_json(404, {'error': 'not found'})
+            return
+        metrics = self.server.metrics
+        metrics.add('requests_total')
+
+        length = self.headers.get('Content-Length') or '0'
+        if not length.isdecimal():
+            self.send_json(400, {'error': 'Content-Length must be a number of bytes'})
+            return
+        length = int(length)
+        if not 0 < length <= MAX_UPLOAD_SIZE:
+            self.send_json(413 if length else 400, {'error': f"expected a PDF body up to {MAX_UPLOAD_SIZE} bytes"})
+            return
+        try:
+            query = parse_qs(url.query)
+            name = query.get('name', [''])[0]
+            start_date, end_date = (datetime.strptime(query[key][0], '%d/%m/%Y') if key in query else None
+                                    for key in ('start', 'end'))
+        except ValueError:
+            self.send_json(400, {'error': 'start and end must be DD/MM/YYYY'})
+            return
+        data = self.rfile.read(length)
+
+        # Request-level concurrency limit: wait briefly for a slot, then shed load
+        if not self.server.slots.acquire(timeout=self.server.queue_timeout):
+            metrics.add('rejected_total')
+            self.send_json(503, {'error': 'too many concurrent requests'}, {'Retry-After': '1'})
+            return
+        metrics.add('in_flight')
+        started = time.perf_counter()
+        # A statement that overruns the pool's task timeout has its worker killed and replaced, as does
+        # one that crashes its worker, so neither holds a slot or breaks the pool for later requests
+        try:
+            result = self.server.executor.submit(parse_upload, data, name, start_date, end_date).result()
+        except TimeoutError as error:
+            metrics.add('failures_total')
+            self.send_json(504, {'error': f"statement took too long to parse: {error}"})
+            return
+        except Exception as error:
+            metrics.add('failures_total')
+            self.send_json(422, {'error': f"could not parse statement: {error}"})
+            return
+        finally:
+            metrics.add('in_flight', -1)
+            metrics.add('parse_seconds_sum', time.perf_counter() - started)
+            metrics.add('parse_seconds_count')
+            self.server.slots.release()
+        self.send_json(200, result)
+
+    def send_json(self, status, body, headers=None):
+        self.send_text(status, json.dumps(body), headers, 'application/json')
+
+    def send_text(self, status, text, headers=None, content_type='text/plain; version=0.0.4'):
+        payload = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+# Function to build the server with its worker pool warmed up
+# Each upload is parsed within timeout seconds by a worker whose address space is capped at memory_limit_mb
+def create_server(host, port, workers, max_concurrent, queue_timeout=5.0,
+                  timeout=FILE_TIMEOUT, memory_limit_mb=FILE_MEMORY_LIMIT_MB):
+    server = ThreadingHTTPServer((host, port), StatementHandler)
+    server.executor = WorkerPool(workers, task_timeout=timeout, memory_limit_mb=memory_limit_mb)
+    # Load the parsing modules in every worker now rather than on the first requests
+    wait([server.executor.submit(warm_worker) for _ in range(workers)])
+    server.slots = threading.BoundedSemaphore(max_concurrent)
+    server.queue_timeout = queue_timeout
+    server.metrics = Metrics()
+    return server
+
+# Main execution function
+def main():
+    parser = argparse.ArgumentParser(description="Serve bank statement parsing over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=4, help="worker processes kept warm")
+    parser.add_argument('--max-concurrent', type=int, default=8, help="requests parsed or queued at once")
+    parser.add_argument('--timeout', type=float, default=FILE_TIMEOUT, help="seconds allowed to parse one upload")
+    parser.add_argument('--memory-limit-mb', type=int, default=FILE_MEMORY_LIMIT_MB, help="address-space cap per worker")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers, args.max_concurrent,
+                           timeout=args.timeout, memory_limit_mb=args.memory_limit_mb)
+    print(f"Serving statement parsing on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown()
+
+# Execute the main function
+if __name__ == "__main__":
+    main()
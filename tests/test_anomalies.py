@@ -0,0 +1,31 @@
+import pytest
+from money import Money, ZERO
+from payees import PayeeRegistry
+from bankstats13 import detect_anomalies
+
+
+@pytest.fixture
+def payees(tmp_path):
+    return PayeeRegistry(str(tmp_path / 'payees.json'))
+
+
+def netflix(amounts):
+    return [(f"05/{month:02d}/2022", 'NETFLIX', Money.parse(amount), ZERO)
+            for month, amount in enumerate(amounts, 1)]
+
+
+def test_jump_after_a_constant_history_is_flagged(payees):
+    anomalies = detect_anomalies(netflix(['99.00'] * 7 + ['9900.00']), payees=payees)
+    assert list(anomalies['amount']) == [9900.0]
+    assert anomalies['reason'][0].startswith('unusual for payee')
+
+
+def test_jump_after_a_jittered_history_is_flagged(payees):
+    history = ['99.00', '99.01', '98.99', '99.00', '99.01', '98.99', '99.00']
+    anomalies = detect_anomalies(netflix(history + ['9900.00']), payees=payees)
+    assert list(anomalies['amount']) == [9900.0]
+    assert anomalies['reason'][0].startswith('unusual for payee')
+
+
+def test_constant_history_alone_is_not_flagged(payees):
+    assert detect_anomalies(netflix(['99.00'] * 7 + ['99.50']), payees=payees).empty
@@ -0,0 +1,37 @@
+from datetime import datetime
+from money import Money, ZERO
+from bankstats13 import parse_transactions_by_columns
+
+COLUMNS = [['date', 0, 80], ['description', 80, 300], ['debit', 300, 380], ['credit', 380, 460], ['balance', 460, 600]]
+PERIOD = (datetime(2022, 1, 1), datetime(2022, 1, 31))
+
+
+# Function to lay a line's words out left to right, each word placed at the given x1
+def line(*cells):
+    return [{'text': text, 'x0': x1 - 5 * len(text), 'x1': x1} for text, x1 in cells]
+
+
+def test_single_amount_goes_to_the_column_it_sits_in():
+    # The regex parser reads a lone amount before the balance as a debit whatever its column
+    pages = [[line(('05/01/2022', 70), ('SALARY', 150), ('ACME', 200), ('5,000.00', 450), ('6,000.00', 590)),
+              line(('06/01/2022', 70), ('SHOP', 150), ('120.50', 370), ('5,879.50', 590))]]
+    assert parse_transactions_by_columns(pages, *PERIOD, COLUMNS) == [
+        ('05/01/2022', 'SALARY ACME', ZERO, Money.parse('5000.00')),
+        ('06/01/2022', 'SHOP', Money.parse('120.50'), ZERO),
+    ]
+
+
+def test_numbers_in_the_description_stay_there():
+    pages = [[line(('07/01/2022', 70), ('INVOICE', 150), ('2022.01', 250), ('99.00', 370), ('5,780.50', 590))]]
+    assert parse_transactions_by_columns(pages, *PERIOD, COLUMNS) == [
+        ('07/01/2022', 'INVOICE 2022.01', Money.parse('99.00'), ZERO),
+    ]
+
+
+def test_lines_outside_the_period_and_without_dates_are_dropped():
+    pages = [[line(('Opening', 70), ('balance', 150), ('1,000.00', 590)),
+              line(('31/12/2021', 70), ('OLD', 150), ('10.00', 370), ('990.00', 590))],
+             [line(('03/01/2022', 70), ('FUEL', 150), ('300.00', 370), ('690.00', 590))]]
+    assert parse_transactions_by_columns(pages, *PERIOD, COLUMNS) == [
+        ('03/01/2022', 'FUEL', Money.parse('300.00'), ZERO),
+    ]
@@ -0,0 +1,63 @@
+from datetime import datetime
+from money import Money
+from accounts import UNKNOWN_ACCOUNT
+from balances import check_continuity
+
+
+def statement(start, end, opening, closing, account='111'):
+    start, end = datetime.strptime(start, '%d/%m/%Y'), datetime.strptime(end, '%d/%m/%Y')
+    summary = {'opening_balance': Money.parse(opening), 'closing_balance': Money.parse(closing)}
+    return (start, end, f"{account}-{start:%Y%m}.pdf", summary, 1, None, account)
+
+
+def problems(summaries):
+    return [(problem, path, next_path) for problem, path, next_path, _ in check_continuity(summaries)]
+
+
+def test_consecutive_statements_follow_on():
+    assert problems([statement('01/01/2022', '31/01/2022', '100.00', '250.00'),
+                     statement('01/02/2022', '28/02/2022', '250.00', '80.00')]) == []
+
+
+def test_accounts_are_chained_separately():
+    # Interleaved by period, the two accounts' balances would never match each other
+    summaries = [statement('01/01/2022', '31/01/2022', '100.00', '250.00', '111'),
+                 statement('01/01/2022', '31/01/2022', '900.00', '950.00', '222'),
+                 statement('01/02/2022', '28/02/2022', '250.00', '80.00', '111'),
+                 statement('01/02/2022', '28/02/2022', '950.00', '10.00', '222')]
+    assert problems(summaries) == []
+
+
+def test_gap_between_statements():
+    assert problems([statement('01/01/2022', '31/01/2022', '100.00', '250.00'),
+                     statement('01/03/2022', '31/03/2022', '250.00', '80.00')]) == \
+        [('gap', '111-202201.pdf', '111-202203.pdf')]
+
+
+def test_overlapping_periods():
+    assert problems([statement('01/01/2022', '31/01/2022', '100.00', '250.00'),
+                     statement('15/01/2022', '14/02/2022', '250.00', '80.00')]) == \
+        [('overlap', '111-202201.pdf', '111-202201.pdf')]
+
+
+def test_balance_mismatch():
+    found = check_continuity([statement('01/01/2022', '31/01/2022', '100.00', '250.00'),
+                              statement('01/02/2022', '28/02/2022', '260.00', '80.00')])
+    assert [(problem, detail) for problem, _, _, detail in found] == \
+        [('balance mismatch', 'closing R250.00 but next opening R260.00 (difference R10.00)')]
+
+
+def test_unknown_account_statements_are_chained_together():
+    summaries = [statement('01/01/2022', '31/01/2022', '100.00', '250.00', UNKNOWN_ACCOUNT),
+                 statement('01/02/2022', '28/02/2022', '250.00', '80.00', '111'),
+                 statement('01/02/2022', '28/02/2022', '300.00', '80.00', UNKNOWN_ACCOUNT)]
+    assert problems(summaries) == [('balance mismatch', 'unknown-202201.pdf', 'unknown-202202.pdf')]
+
+
+def test_missing_period_and_balance():
+    undated = (None, None, 'undated.pdf', {}, 0, None, '111')
+    unread = statement('01/02/2022', '28/02/2022', '0.00', '0.00')
+    unread[3].pop('opening_balance')
+    summaries = [statement('01/01/2022', '31/01/2022', '100.00', '250.00'), unread, undated]
+    assert problems(summaries) == [('no period', 'undated.pdf', None),
+                                   ('unchecked', '111-202201.pdf', '111-202202.pdf')]
@@ -0,0 +1,95 @@
+import csv
+import gzip
+import json
+import pytest
+from money import Money, ZERO
+from exporters import EXPORT_COLUMNS, TransactionExporter, export_path, rewind_export
+
+SUMMARY = {'statement_period': '01 Jan 2022 - 30 Jan 2022'}
+
+
+def transactions(count, start=0):
+    return [(f"{day % 28 + 1:02d}/01/2022", f"SHOP {day}", Money(100 + day), ZERO) for day in range(start, start + count)]
+
+
+def read_text(path, compression=None):
+    if compression == 'gzip':
+        export_file = gzip.open(path, 'rt', encoding='utf-8', newline='')
+    else:
+        export_file = open(path, encoding='utf-8', newline='')
+    with export_file:
+        return export_file.read()
+
+
+def test_export_path():
+    assert export_path('transactions') == 'transactions.csv'
+    assert export_path('transactions', 'jsonl', 'gzip') == 'transactions.jsonl.gz'
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TransactionExporter(str(tmp_path / 'out.xml'), 'xml')
+
+
+def test_csv_rows_and_offsets(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    with TransactionExporter(path, chunk_rows=2) as exporter:
+        exporter.write_statement('a.pdf', SUMMARY, transactions(3))
+        # The first two rows filled a chunk and were flushed on their own; the third is still buffered
+        assert exporter.offset == len(read_text(path).encode())
+        exporter.flush()
+        assert exporter.offset == len(read_text(path).encode())
+    rows = list(csv.DictReader(read_text(path).splitlines()))
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert [row['debit'] for row in rows] == ['1.00', '1.01', '1.02']
+    assert rows[0]['credit'] == '0.00' and rows[0]['statement_period'] == SUMMARY['statement_period']
+
+
+def test_jsonl_rows(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    with TransactionExporter(path, 'jsonl') as exporter:
+        exporter.write_statement('a.pdf', None, transactions(2))
+    records = [json.loads(line) for line in read_text(path).splitlines()]
+    assert [record['description'] for record in records] == ['SHOP 0', 'SHOP 1']
+    assert records[0]['statement_period'] == ''
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_rewind_and_append_resume_a_crashed_export(tmp_path, compression):
+    path = str(tmp_path / export_path('out', 'csv', compression))
+    crashed = str(tmp_path / export_path('crashed', 'csv', compression))
+    with TransactionExporter(path, compression=compression) as exporter:
+        exporter.write_statement('a.pdf', SUMMARY, transactions(2))
+        exporter.flush()
+        checkpoint = exporter.offset
+        # Rows flushed after the checkpoint belong to a statement the journal never recorded
+        exporter.write_statement('b.pdf', SUMMARY, transactions(2, 10))
+        exporter.flush()
+        # What a killed run leaves on disk: no gzip trailer after the last flushed block
+        with open(path, 'rb') as export_file, open(crashed, 'wb') as crashed_file:
+            crashed_file.write(export_file.read())
+    expected = read_text(path, compression).encode()[:checkpoint].decode()
+
+    rewind_export(crashed, compression, checkpoint)
+    assert read_text(crashed, compression) == expected
+
+    with TransactionExporter(crashed, compression=compression, append=True, offset=checkpoint) as exporter:
+        assert exporter.offset == checkpoint
+        exporter.write_statement('c.pdf', SUMMARY, transactions(1, 20))
+    assert exporter.offset == len(read_text(crashed, compression).encode())
+    rows = list(csv.DictReader(read_text(crashed, compression).splitlines()))
+    assert [row['statement'] for row in rows] == ['a.pdf', 'a.pdf', 'c.pdf']
+
+
+def test_zstd_round_trip(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = str(tmp_path / 'out.csv.zst')
+    with TransactionExporter(path, compression='zstd') as exporter:
+        exporter.write_statement('a.pdf', SUMMARY, transactions(2))
+        exporter.flush()
+        checkpoint = exporter.offset
+        exporter.write_statement('b.pdf', SUMMARY, transactions(2))
+    rewind_export(path, 'zstd', checkpoint)
+    with open(path, 'rb') as export_file:
+        text = zstandard.ZstdDecompressor().stream_reader(export_file).read().decode()
+    assert len(text.encode()) == checkpoint and 'b.pdf' not in text
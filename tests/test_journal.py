@@ -0,0 +1,93 @@
+import os
+import json
+from journal import JOURNAL_NAME, RunJournal, format_error
+
+
+def failure(message):
+    try:
+        raise ValueError(message)
+    except ValueError as error:
+        return error
+
+
+def test_resume_restores_done_and_failed_statements(tmp_path):
+    folder = str(tmp_path)
+    export = os.path.join(folder, 'transactions.csv')
+    open(export, 'w').close()
+    with RunJournal(folder) as journal:
+        journal.start_export(export, 'csv', None, 52)
+        journal.record_done('a.pdf', 52, 160, 3)
+        journal.quarantine('b.pdf', b'%PDF-broken', failure('bad xref'))
+
+    with RunJournal(folder) as journal:
+        assert journal.resumable(export, 'csv', None)
+        assert not journal.resumable(export, 'jsonl', None)
+        assert not journal.resumable(export, 'csv', 'gzip')
+        assert journal.offset == 160
+        assert journal.finished('a.pdf') and journal.finished('a.pdf', retry_failed=True)
+        assert journal.finished('b.pdf') and not journal.finished('b.pdf', retry_failed=True)
+        assert not journal.finished('c.pdf')
+
+        # A retried statement that now succeeds is no longer failed
+        journal.record_done('b.pdf', 160, 200, 1)
+        assert journal.offset == 200 and 'b.pdf' not in journal.failed
+
+
+def test_resumable_needs_the_export_file(tmp_path):
+    folder = str(tmp_path)
+    export = os.path.join(folder, 'transactions.csv')
+    with RunJournal(folder) as journal:
+        journal.start_export(export, 'csv', None, 0)
+        assert not journal.resumable(export, 'csv', None)
+
+
+def test_new_export_forgets_earlier_statements(tmp_path):
+    folder = str(tmp_path)
+    with RunJournal(folder) as journal:
+        journal.start_export('one.csv', 'csv', None, 10)
+        journal.record_done('a.pdf', 10, 20, 1)
+        journal.start_export('two.csv', 'csv', None, 5)
+        assert journal.completed == {} and journal.offset == 5
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    folder = str(tmp_path)
+    with RunJournal(folder) as journal:
+        journal.start_export('out.csv', 'csv', None, 0)
+        journal.record_done('a.pdf', 0, 40, 2)
+    path = os.path.join(folder, JOURNAL_NAME)
+    intact = os.path.getsize(path)
+    with open(path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write('{"event": "done", "name": "b.p')
+
+    with RunJournal(folder) as journal:
+        assert set(journal.completed) == {'a.pdf'} and journal.offset == 40
+        assert os.path.getsize(path) == intact
+        journal.record_done('c.pdf', 40, 90, 4)
+    with open(path, encoding='utf-8') as journal_file:
+        assert [json.loads(line)['event'] for line in journal_file] == ['export', 'done', 'done']
+
+
+def test_quarantine_saves_bytes_and_traceback(tmp_path):
+    folder = str(tmp_path)
+    error = failure('bad xref')
+    error.remote_traceback = 'Traceback (worker):\n  ValueError: bad xref\n'
+    with RunJournal(folder) as journal:
+        journal.quarantine('archive.zip!2022/statement.pdf', b'%PDF-broken', error)
+        journal.quarantine('unreadable.pdf', OSError('gone'), OSError('gone'))
+        record = journal.failed['archive.zip!2022/statement.pdf']
+
+    assert record['quarantined'].endswith('-statement.pdf')
+    with open(record['quarantined'], 'rb') as saved:
+        assert saved.read() == b'%PDF-broken'
+    with open(f"{record['quarantined']}.traceback.txt", encoding='utf-8') as traceback_file:
+        details = traceback_file.read()
+    assert details.startswith('archive.zip!2022/statement.pdf')
+    assert 'Traceback (worker)' in details and 'Raised in the pipeline' in details
+    # Statements whose bytes could not be read leave only their traceback
+    with RunJournal(folder) as journal:
+        assert journal.failed['unreadable.pdf']['quarantined'] is None
+
+
+def test_format_error_without_worker_traceback():
+    assert 'ValueError: bad xref' in format_error(failure('bad xref'))
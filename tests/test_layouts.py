@@ -0,0 +1,28 @@
+from layouts import layout_fingerprint, load_layouts, save_layouts
+
+
+class FakePage:
+    width = 595
+
+    def __init__(self, title):
+        header = ['Date', 'Description', 'Debits', 'Credits', 'Balance']
+        self.words = [{'text': text, 'top': 50, 'x0': 10 + 60 * i, 'x1': 40 + 60 * i} for i, text in enumerate(title)]
+        self.words += [{'text': text, 'top': 200, 'x0': 10 + 110 * i, 'x1': 60 + 110 * i} for i, text in enumerate(header)]
+
+    def extract_words(self):
+        return self.words
+
+
+def test_fingerprint_ignores_the_customer_details():
+    first, header = layout_fingerprint(FakePage(['Mr', 'A', 'Smith', 'Cape', 'Town']))
+    second, _ = layout_fingerprint(FakePage(['Ms', 'B', 'Jones', 'Durban']))
+    assert first == second
+    assert [column[0] for column in header] == ['date', 'description', 'debit', 'credit', 'balance']
+
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    cache_path = str(tmp_path / 'layouts.json')
+    save_layouts({'a': {'name': 'one'}}, cache_path)
+    save_layouts({'b': {'name': 'two'}}, cache_path)
+    assert load_layouts(cache_path) == {'b': {'name': 'two'}}
+    assert [path.name for path in tmp_path.iterdir()] == ['layouts.json']
@@ -0,0 +1,63 @@
+import pickle
+from decimal import Decimal
+import pytest
+from money import Money, ZERO, cents_array
+
+
+@pytest.mark.parametrize('text, cents', [
+    ('1,234.56', 123456),
+    ('1,234.56*', 123456),
+    ('12.00-', -1200),
+    ('-12.5', -1250),
+    ('R99', 9900),
+    ('-R5.01', -501),
+    ('.75', 75),
+    ('0.00', 0),
+])
+def test_parse(text, cents):
+    assert Money.parse(text).cents == cents
+
+
+@pytest.mark.parametrize('text', ['', '-', 'abc', '1.234', '12.3.4', '1e5', '--5', '１２.00'])
+def test_parse_rejects_invalid_amounts(text):
+    with pytest.raises(ValueError):
+        Money.parse(text)
+
+
+def test_arithmetic_is_exact():
+    amounts = [Money.parse('0.10')] * 3
+    assert sum(amounts) == Money.parse('0.30')
+    assert Money.total(amounts) == Money(30)
+    assert Money.parse('5.00') - Money.parse('7.25') == Money(-225)
+    assert abs(Money(-225)) == Money(225)
+    assert -Money(5) == Money(-5)
+
+
+def test_comparisons_and_truthiness():
+    assert Money(1) > ZERO > Money(-1)
+    assert Money(1) >= Money(1) and Money(1) <= Money(1)
+    assert not ZERO and Money(1)
+    assert Money(5) != 5
+    assert len({Money(5), Money(5)}) == 1
+
+
+def test_formatting():
+    amount = Money.parse('-1,234.5')
+    assert str(amount) == 'R-1234.50'
+    assert f"{amount:.2f}" == '-1234.50'
+    assert f"{amount:,.2f}" == '-1,234.50'
+    assert repr(amount) == "Money('-1234.50')"
+    assert float(amount) == -1234.5
+
+
+def test_decimal_round_trip():
+    assert Money.from_decimal('19.999') == Money(2000)
+    assert Money(123456).to_decimal() == Decimal('1234.56')
+
+
+def test_pickles_for_worker_results():
+    assert pickle.loads(pickle.dumps(Money(-1200))) == Money(-1200)
+
+
+def test_cents_array():
+    assert cents_array([Money(1), Money(-2)]).tolist() == [1, -2]
@@ -0,0 +1,41 @@
+from datetime import datetime
+from extractors import page_actions, text_date_span
+
+
+def day(n):
+    return datetime(2022, 1, n)
+
+
+def span(first, last, order=None):
+    return day(first), day(last), order
+
+
+def test_text_date_span_reads_the_order():
+    assert text_date_span("02/01/2022 A 1.00\n09/01/2022 B 2.00\n") == (day(2), day(9), True)
+    assert text_date_span("09/01/2022 B 2.00\n02/01/2022 A 1.00\n") == (day(2), day(9), False)
+    assert text_date_span("05/01/2022 A 1.00\n") == (day(5), day(5), None)
+    assert text_date_span("no transactions") == (None, None, None)
+
+
+def test_ascending_statement_stops_after_the_period():
+    spans = [span(1, 5, True), span(6, 10, True), span(11, 15, True), span(16, 20, True)]
+    assert list(page_actions(spans, day(7), day(12))) == ['keep', 'keep', 'keep', 'stop']
+
+
+def test_descending_statement_stops_after_the_period():
+    spans = [span(16, 20, False), span(11, 15, False), span(6, 10, False), span(1, 5, False)]
+    assert list(page_actions(spans, day(7), day(12))) == ['keep', 'keep', 'keep', 'stop']
+    assert list(page_actions(spans, day(1), day(5))) == ['keep', 'skip', 'skip', 'keep']
+
+
+def test_order_learnt_from_successive_pages():
+    # Pages with one date each cannot show their own order
+    spans = [span(20, 20), span(15, 15), span(10, 10), span(5, 5)]
+    assert list(page_actions(spans, day(12), day(31))) == ['keep', 'keep', 'stop', 'stop']
+
+
+def test_undetermined_order_never_stops():
+    # Overlapping spans, and pages without dates, show neither order
+    spans = [span(1, 10), span(5, 8), (None, None, None), span(2, 9)]
+    assert list(page_actions(spans, day(20), day(25))) == ['keep', 'skip', 'keep', 'skip']
+    assert list(page_actions(spans, day(1), day(3))) == ['keep', 'skip', 'keep', 'keep']
@@ -0,0 +1,34 @@
+import pytest
+from payees import PayeeRegistry, canonical_payee
+
+
+@pytest.mark.parametrize('description, payee', [
+    ('WOOLWORTHS CARD 4350', 'WOOLWORTHS'),
+    ('SALARY ACME REF 123', 'SALARY ACME'),
+    ('EFT PAYMENT REF: AB12CD RENT', 'EFT PAYMENT RENT'),
+    ('DEBIT ORDER REFERENCE NO. 5521 INSURER', 'DEBIT ORDER INSURER'),
+    ('TRANSFER REF#77 SAVINGS', 'TRANSFER SAVINGS'),
+    ('REFUND TAKEALOT', 'REFUND TAKEALOT'),
+    ('REFLEX GYM MONTHLY', 'REFLEX GYM MONTHLY'),
+    ('PAYMENT REF SMITH', 'PAYMENT REF SMITH'),
+    ('POS 12/03 14:22 SPAR', 'POS SPAR'),
+    ('', 'UNKNOWN'),
+])
+def test_canonical_payee(description, payee):
+    assert canonical_payee(description) == payee
+
+
+def test_registry_ids_survive_a_reload(tmp_path):
+    cache_path = str(tmp_path / 'payees.json')
+    registry = PayeeRegistry(cache_path, maxsize=2)
+    first = registry.payee_id('WOOLWORTHS CARD 1')
+    assert registry.payee_id('WOOLWORTHS CARD 2') == first
+    refund = registry.payee_id('REFUND TAKEALOT')
+    assert refund != first and registry.name(refund) == 'REFUND TAKEALOT'
+    # The LRU keeps only the two most recent raw descriptions
+    assert list(registry.mappings) == ['WOOLWORTHS CARD 2', 'REFUND TAKEALOT']
+    registry.save()
+
+    reloaded = PayeeRegistry(cache_path, maxsize=2)
+    assert reloaded.names == registry.names
+    assert reloaded.payee_id('WOOLWORTHS CARD 3') == first
@@ -0,0 +1,29 @@
+import pandas as pd
+from bankstats13 import TABLE_COLUMNS, normalize_table, table_column_names
+
+
+def test_bankstats2_header_keeps_its_amounts():
+    table = pd.DataFrame([['01/01/2022', 'SHOP', '', '150.00', '', '850.00']],
+                         columns=['Date', 'Description', 'Fees (R)', 'Debits (R)', 'Credits (R)', 'Balance (R)'])
+    assert table_column_names(table) == ['date', 'description', 'fees', 'debit', 'credit', 'balance']
+    normalized, _ = normalize_table(table)
+    assert list(normalized.columns) == TABLE_COLUMNS
+    row = normalized.iloc[0]
+    assert (row['date'], row['description'], row['debit'], row['balance']) == ('01/01/2022', 'SHOP', '150.00', '850.00')
+
+
+def test_continuation_table_reuses_the_previous_header():
+    first = pd.DataFrame([['01/01/2022', 'SHOP', '150.00', '850.00']],
+                         columns=['Date:', 'Details', 'Debits (R)', 'Balance (R)'])
+    _, names = normalize_table(first)
+    # tabula took the continuation page's first transaction as its header
+    second = pd.DataFrame([['03/01/2022', 'FUEL', '300.00', '550.00']],
+                          columns=['02/01/2022', 'BREAD', '20.00', '830.00'])
+    normalized, _ = normalize_table(second, names)
+    assert list(normalized['description']) == ['BREAD', 'FUEL']
+    assert list(normalized['debit']) == ['20.00', '300.00']
+
+
+def test_unrecognised_table_is_skipped():
+    table = pd.DataFrame([['a', 'b']], columns=['Branch', 'Code'])
+    assert normalize_table(table) == (None, None)
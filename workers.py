@@ -0,0 +1,198 @@
+"""
+Process pool for long batch runs that recycles workers after a number of files or a memory ceiling.
+"""
+import os
+import sys
+import time
+import pickle
+import resource
+import threading
+import traceback
+import itertools
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Future
+
+# Function to read this process's resident set size in megabytes
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS; reported in bytes on macOS and kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+# Worker loop: run tasks until told to stop or until the file or memory budget is spent
+# memory_limit_mb caps the worker's address space so a runaway file fails with MemoryError; it
+# counts virtual memory, so keep it well above what a JVM (tabula) would reserve if one is loaded
+def worker_loop(task_queue, result_conn, max_files, max_memory_mb, memory_limit_mb=None):
+    if memory_limit_mb:
+        limit = int(memory_limit_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    files = 0
+    while (task := task_queue.get()) is not None:
+        task_id, fn, args = task
+        result_conn.send(('start', task_id))
+        out_of_memory = False
+        # Pickle here so an unpicklable result fails this task rather than the worker
+        try:
+            ok, payload = True, pickle.dumps(fn(*args))
+        except Exception as error:
+            # Keep the worker-side traceback; only the exception itself crosses the pipe
+            error.remote_traceback = traceback.format_exc()
+            # The worker's heap may be left in a poor state after hitting the limit, so replace it
+            out_of_memory = isinstance(error, MemoryError)
+            try:
+                ok, payload = False, pickle.dumps(error)
+            except Exception:
+                ok, payload = False, pickle.dumps(RuntimeError(repr(error)))
+        rss = current_rss_mb()
+        result_conn.send(('done', task_id, ok, payload, rss))
+
+        files += 1
+        if out_of_memory or (max_files and files >= max_files) or (max_memory_mb and rss >= max_memory_mb):
+            result_conn.send(('recycle', None))
+            break
+    result_conn.close()
+
+# Class running functions in worker processes that are replaced when they hit their budget
+# task_timeout kills a worker whose task runs longer, failing that task with TimeoutError;
+# memory_limit_mb is the address-space cap applied in each worker
+class WorkerPool:
+    def __init__(self, workers=None, max_files=None, max_memory_mb=None, task_timeout=None, memory_limit_mb=None):
+        self.workers = workers or os.cpu_count()
+        self.max_files = max_files
+        self.max_memory_mb = max_memory_mb
+        self.task_timeout = task_timeout
+        self.memory_limit_mb = memory_limit_mb
+        # Workers are started while other threads run and print; forking then could copy a held lock
+        # (stdout's, say) into the child, so they come from a fork server, or are spawned where there is none
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.context = multiprocessing.get_context(start_method)
+        self.task_queue = self.context.Queue()
+        self.processes = {}
+        self.connections = {}
+        self.futures = {}
+        self.running = {}
+        self.recycling = set()
+        self.timed_out = set()
+        self.recycled = 0
+        self.killed = 0
+        self.peak_rss_mb = 0.0
+        self.task_ids = itertools.count()
+        self.lock = threading.Lock()
+        self.closing = False
+        with self.lock:
+            for _ in range(self.workers):
+                self._spawn()
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    # Each worker reports on its own pipe, so a worker dying mid-send cannot block the others
+    def _spawn(self):
+        reader, writer = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=worker_loop, daemon=True,
+                                       args=(self.task_queue, writer, self.max_files, self.max_memory_mb,
+                                             self.memory_limit_mb))
+        process.start()
+        writer.close()
+        self.processes[process.pid] = process
+        self.connections[reader] = process.pid
+
+    # Function to queue fn(*args) on the pool, returning a concurrent.futures.Future
+    def submit(self, fn, *args):
+        future = Future()
+        with self.lock:
+            task_id = next(self.task_ids)
+            self.futures[task_id] = future
+        self.task_queue.put((task_id, fn, args))
+        return future
+
+    # Collector thread: resolve futures, track RSS and replace workers that exit, die or overrun
+    def _collect(self):
+        while True:
+            with self.lock:
+                connections = list(self.connections)
+            ready = wait(connections, timeout=0.5)
+            with self.lock:
+                for conn in ready:
+                    try:
+                        self._handle(self.connections[conn], conn.recv())
+                    except (EOFError, OSError):
+                        self._retire(conn)
+                if self.task_timeout:
+                    self._kill_overdue()
+                if self.closing and not self.processes:
+                    return
+
+    # Function to kill workers whose current task has run past task_timeout; their pipe then
+    # closes and _retire fails the task and starts a replacement
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for conn, pid in list(self.connections.items()):
+            task_id, started = self.running.get(pid, (None, now))
+            # A worker that has already reported back is not killed: it may be waiting on the task queue
+            if task_id is None or now - started < self.task_timeout or pid in self.timed_out or conn.poll():
+                continue
+            self.timed_out.add(pid)
+            self.processes[pid].kill()
+
+    def _handle(self, pid, message):
+        kind, task_id, *rest = message
+        if kind == 'start':
+            self.running[pid] = (task_id, time.monotonic())
+        elif kind == 'done':
+            ok, payload, rss = rest
+            self.running.pop(pid, None)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+            future = self.futures.pop(task_id)
+            try:
+                value = pickle.loads(payload)
+            except Exception as error:
+                ok, value = False, RuntimeError(f"could not unpickle worker result: {error!r}")
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        elif kind == 'recycle':
+            self.recycling.add(pid)
+
+    # Function to clean up after a worker whose pipe closed, failing the task it was running
+    def _retire(self, conn):
+        pid = self.connections.pop(conn)
+        conn.close()
+        process = self.processes.pop(pid)
+        process.join()
+        task_id, _ = self.running.pop(pid, (None, None))
+        if pid in self.timed_out:
+            self.timed_out.discard(pid)
+            self.killed += 1
+            error = TimeoutError(f"task took longer than {self.task_timeout}s; worker {pid} was killed")
+        else:
+            error = RuntimeError(f"worker {pid} died with exit code {process.exitcode}")
+        if task_id is not None:
+            self.futures.pop(task_id).set_exception(error)
+        if pid in self.recycling:
+            self.recycling.discard(pid)
+            self.recycled += 1
+        if not self.closing:
+            self._spawn()
+
+    # Function to wait for queued work, then stop every worker
+    def shutdown(self):
+        with self.lock:
+            pending = list(self.futures.values())
+        for future in pending:
+            future.exception()
+        with self.lock:
+            self.closing = True
+            for _ in self.processes:
+                self.task_queue.put(None)
+        self.collector.join()
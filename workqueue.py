@@ -0,0 +1,227 @@
+"""
+Distributed batch mode: a SQLite work queue on a shared volume that workers on several hosts claim
+statements from, with leases so the statements of a dead worker are retried by another.
+
+python workqueue.py enqueue QUEUE.db FOLDER... [--start DD/MM/YYYY --end DD/MM/YYYY]
+python workqueue.py work QUEUE.db OUTPUT_FOLDER [--processes N] [--wait] [--timeout SECONDS]
+python workqueue.py status QUEUE.db
+"""
+import os
+import time
+import socket
+import sqlite3
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+from bankstats13 import parse_pdf_name, index_statements, parse_statement
+from exporters import TransactionExporter
+from workers import WorkerPool
+from pipeline import FILE_TIMEOUT, FILE_MEMORY_LIMIT_MB, RECYCLE_AFTER_FILES, RECYCLE_AFTER_MB
+
+# A claimed statement is handed to another worker if its lease is not renewed in time
+LEASE_SECONDS = 120
+HEARTBEAT_SECONDS = 30
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    path TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    output TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until);
+"""
+
+# Function to open the queue database; the rollback journal is kept because WAL needs shared memory
+# that network filesystems cannot provide
+def connect(db_path):
+    connection = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    connection.executescript(SCHEMA)
+    return connection
+
+# Function to add statements to the queue; statements already queued are left as they are
+def enqueue(connection, paths):
+    before = connection.total_changes
+    connection.executemany("INSERT OR IGNORE INTO tasks (path, updated) VALUES (?, ?)",
+                           ((os.path.abspath(path), time.time()) for path in paths))
+    return connection.total_changes - before
+
+# Function to claim the next pending statement, or one whose worker stopped renewing its lease
+def claim(connection, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # Statements whose last allowed attempt died with its worker will not be retried
+        connection.execute(
+            "UPDATE tasks SET status = 'failed', error = 'worker ' || worker || ' stopped renewing its lease', "
+            "updated = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, now, max_attempts))
+        row = connection.execute(
+            "SELECT path FROM tasks WHERE attempts < ? AND "
+            "(status = 'pending' OR (status = 'running' AND lease_until < ?)) LIMIT 1",
+            (max_attempts, now)).fetchone()
+        if row:
+            connection.execute(
+                "UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated = ? WHERE path = ?", (worker, now + lease_seconds, now, row[0]))
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    return row[0] if row else None
+
+# Function to extend a claimed statement's lease; False if another worker has taken it over
+def renew(connection, path, worker, lease_seconds=LEASE_SECONDS):
+    cursor = connection.execute(
+        "UPDATE tasks SET lease_until = ? WHERE path = ? AND worker = ? AND status = 'running'",
+        (time.time() + lease_seconds, path, worker))
+    return cursor.rowcount == 1
+
+# Function to record a finished statement, provided this worker still holds it
+def complete(connection, path, worker, output):
+    connection.execute(
+        "UPDATE tasks SET status = 'done', output = ?, error = NULL, updated = ? "
+        "WHERE path = ? AND worker = ? AND status = 'running'", (output, time.time(), path, worker))
+
+# Function to record a failed attempt: back to pending for a retry, or failed after MAX_ATTEMPTS
+def fail(connection, path, worker, error, max_attempts=MAX_ATTEMPTS):
+    connection.execute(
+        "UPDATE tasks SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+        "error = ?, lease_until = NULL, updated = ? WHERE path = ? AND worker = ? AND status = 'running'",
+        (max_attempts, error, time.time(), path, worker))
+
+# Function to count the statements in each state, including expired leases of dead workers
+def queue_status(connection):
+    counts = dict(connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+    counts['expired'] = connection.execute(
+        "SELECT COUNT(*) FROM tasks WHERE status = 'running' AND lease_until < ?", (time.time(),)).fetchone()[0]
+    return counts
+
+# Function to name a statement's output from its path, so a retry rewrites the same file
+def output_path(output_folder, path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_folder, f"{stem}-{hashlib.sha1(path.encode()).hexdigest()[:8]}.transactions.csv")
+
+# Function to name the file a worker writes a statement's output to before publishing it
+def partial_path(output, worker):
+    return f"{output}.{worker.replace(':', '-')}.tmp"
+
+# Function to parse one statement and publish its transactions atomically with os.replace
+# (runs in the worker's child process, so an attempt that overruns can be killed)
+def process_statement(path, output_folder, worker):
+    start_date, end_date = parse_pdf_name(os.path.basename(path))
+    summary, transactions = parse_statement(path, start_date, end_date)
+
+    output = output_path(output_folder, path)
+    partial = partial_path(output, worker)
+    with TransactionExporter(partial) as exporter:
+        exporter.write_statement(path, summary, transactions)
+    os.replace(partial, output)
+    return output
+
+# Function to keep renewing a claim from a background thread until stopped
+def heartbeat(db_path, path, worker, stop):
+    connection = connect(db_path)
+    try:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            if not renew(connection, path, worker):
+                break
+    finally:
+        connection.close()
+
+# Function to claim and process statements until the queue has nothing left to claim
+# Each statement is parsed in a child process that is killed after `timeout` seconds, so a statement
+# that hangs the parser fails this attempt (and is retried elsewhere) instead of holding its lease forever
+def run_worker(db_path, output_folder, worker=None, exit_when_empty=True,
+               timeout=FILE_TIMEOUT, memory_limit_mb=FILE_MEMORY_LIMIT_MB):
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    os.makedirs(output_folder, exist_ok=True)
+    connection = connect(db_path)
+    processed = 0
+    try:
+        with WorkerPool(1, RECYCLE_AFTER_FILES, RECYCLE_AFTER_MB, timeout, memory_limit_mb) as pool:
+            while True:
+                path = claim(connection, worker)
+                if path is None:
+                    counts = queue_status(connection)
+                    if exit_when_empty and not counts.get('running') and not counts.get('pending'):
+                        break
+                    time.sleep(POLL_SECONDS)
+                    continue
+
+                stop = threading.Event()
+                beat = threading.Thread(target=heartbeat, args=(db_path, path, worker, stop), daemon=True)
+                beat.start()
+                try:
+                    output = pool.submit(process_statement, path, output_folder, worker).result()
+                except Exception as error:
+                    print(f"Warning: {worker} failed on {path}: {error}")
+                    fail(connection, path, worker, repr(error))
+                    # A killed attempt can leave its unpublished output behind
+                    partial = partial_path(output_path(output_folder, path), worker)
+                    if os.path.exists(partial):
+                        os.remove(partial)
+                else:
+                    complete(connection, path, worker, output)
+                    processed += 1
+                    print(f"{worker} processed {path} -> {output}")
+                finally:
+                    stop.set()
+                    beat.join()
+    finally:
+        connection.close()
+    return processed
+
+# Main execution function
+def main():
+    parser = argparse.ArgumentParser(description="Distributed statement processing over a shared SQLite queue.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = commands.add_parser('enqueue', help="queue the statements in folders")
+    enqueue_parser.add_argument('db')
+    enqueue_parser.add_argument('folders', nargs='+')
+    enqueue_parser.add_argument('--start', help="first date DD/MM/YYYY")
+    enqueue_parser.add_argument('--end', help="last date DD/MM/YYYY")
+    work_parser = commands.add_parser('work', help="claim and process queued statements")
+    work_parser.add_argument('db')
+    work_parser.add_argument('output_folder')
+    work_parser.add_argument('--processes', type=int, default=1, help="worker processes on this host")
+    work_parser.add_argument('--wait', action='store_true', help="keep polling when the queue is empty")
+    work_parser.add_argument('--timeout', type=float, default=FILE_TIMEOUT, help="seconds allowed per statement")
+    work_parser.add_argument('--memory-limit-mb', type=int, default=FILE_MEMORY_LIMIT_MB,
+                             help="address-space cap for the parsing process")
+    status_parser = commands.add_parser('status', help="show queue counts")
+    status_parser.add_argument('db')
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        start_date = datetime.strptime(args.start, '%d/%m/%Y') if args.start else None
+        end_date = datetime.strptime(args.end, '%d/%m/%Y') if args.end else None
+        connection = connect(args.db)
+        for folder in args.folders:
+            added = enqueue(connection, [path for _, _, path in index_statements(folder, start_date, end_date)])
+            print(f"Queued {added} new statements from {folder}")
+        connection.close()
+    elif args.command == 'work':
+        processes = [multiprocessing.Process(target=run_worker, args=(args.db, args.output_folder, None, not args.wait,
+                                                                      args.timeout, args.memory_limit_mb))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        connection = connect(args.db)
+        for status, count in sorted(queue_status(connection).items()):
+            print(f"{status}: {count}")
+        connection.close()
+
+# Execute the main function
+if __name__ == "__main__":
+    main()